@@ -1,6 +1,5 @@
 import requests
-from datetime import datetime, timedelta
-from collections import Counter
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional
 import json
 from sqlalchemy.orm import Session
@@ -12,6 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from storage.models import Vacancy
+from storage.rollups import rollup_counts, rollup_summary, rollup_tech_counts
 from config import DEEPSEEK_API_KEY, DEEPSEEK_MODEL, DEEPSEEK_API_URL, ANALYTICS_PROMPT
 
 class DeepseekAnalyzer:
@@ -25,27 +25,27 @@ class DeepseekAnalyzer:
         """
         Анализирует вакансии с помощью DeepSeek AI
         """
-        # Получаем данные за последнюю неделю
-        week_ago = datetime.now() - timedelta(days=7)
-        current_vacancies = db.query(Vacancy).filter(
-            Vacancy.created_at >= week_ago
-        ).all()
-
-        # Получаем данные за предыдущую неделю для сравнения
-        two_weeks_ago = datetime.now() - timedelta(days=14)
-        previous_vacancies = db.query(Vacancy).filter(
-            Vacancy.created_at >= two_weeks_ago,
-            Vacancy.created_at < week_ago
-        ).all()
+        # Недели считаются по дням: текущая - последние 7 дней, включая сегодня
+        today = datetime.now().date()
+        week_ago = today - timedelta(days=6)
+        two_weeks_ago = week_ago - timedelta(days=7)
+
+        # Агрегаты берутся из дневных сводок, из таблицы - только примеры вакансий
+        current = rollup_summary(db, week_ago)
+        previous = rollup_summary(db, two_weeks_ago, week_ago)
+        sample_vacancies = db.query(Vacancy).filter(
+            Vacancy.created_at >= datetime.combine(week_ago, datetime.min.time())
+        ).order_by(Vacancy.created_at.desc()).limit(10).all()
 
         # Подготавливаем данные для анализа
-        tech_stats = self._calculate_tech_stats(current_vacancies)
-        regional_stats = self._calculate_regional_stats(current_vacancies)
-        changes = self._calculate_changes(current_vacancies, previous_vacancies)
+        tech_stats = self._calculate_tech_stats(db, week_ago)
+        previous_tech_stats = self._calculate_tech_stats(db, two_weeks_ago, week_ago)
+        regional_stats = self._calculate_regional_stats(db, week_ago)
+        changes = self._calculate_changes(current, previous, tech_stats, previous_tech_stats)
 
         # Форматируем данные для промпта
         prompt_data = ANALYTICS_PROMPT.format(
-            vacancies=self._format_vacancies(current_vacancies[:10]),  # Первые 10 вакансий для примера
+            vacancies=self._format_vacancies(sample_vacancies),  # 10 последних вакансий для примера
             tech_stats=json.dumps(tech_stats, ensure_ascii=False, indent=2),
             regional_stats=json.dumps(regional_stats, ensure_ascii=False, indent=2),
             changes=json.dumps(changes, ensure_ascii=False, indent=2)
@@ -55,47 +55,38 @@ class DeepseekAnalyzer:
         response = self._send_to_deepseek(prompt_data)
         return response
 
-    def _calculate_tech_stats(self, vacancies: List[Vacancy]) -> Dict[str, int]:
-        """Подсчитывает упоминания технологий"""
-        tech_counter = Counter()
-        for vacancy in vacancies:
-            if vacancy.tech_stack:
-                techs = [t.strip().lower() for t in vacancy.tech_stack.split(',')]
-                tech_counter.update(techs)
-        return dict(tech_counter.most_common())
+    def _calculate_tech_stats(self, db: Session, since: date, until: Optional[date] = None) -> Dict[str, int]:
+        """Подсчитывает упоминания технологий в вакансиях за период"""
+        return rollup_tech_counts(db, since, until)
 
-    def _calculate_regional_stats(self, vacancies: List[Vacancy]) -> Dict[str, int]:
+    def _calculate_regional_stats(self, db: Session, since: date) -> Dict[str, int]:
         """Подсчитывает распределение по регионам"""
-        region_counter = Counter()
-        for vacancy in vacancies:
-            if vacancy.city:
-                region_counter[vacancy.city] += 1
-        return dict(region_counter.most_common())
+        return {city: count for city, count in rollup_counts(db, "city", since).items() if city}
 
-    def _calculate_changes(self, current: List[Vacancy], previous: List[Vacancy]) -> Dict:
+    def _calculate_changes(self,
+                           current: Dict,
+                           previous: Dict,
+                           current_tech_stats: Dict[str, int],
+                           previous_tech_stats: Dict[str, int]) -> Dict:
         """Вычисляет изменения между периодами"""
-        current_tech_stats = self._calculate_tech_stats(current)
-        previous_tech_stats = self._calculate_tech_stats(previous)
-        
         return {
             "total_vacancies": {
-                "current": len(current),
-                "previous": len(previous),
-                "change_percent": ((len(current) - len(previous)) / len(previous) * 100) if previous else 0
+                "current": current["vacancies"],
+                "previous": previous["vacancies"],
+                "change_percent": ((current["vacancies"] - previous["vacancies"]) / previous["vacancies"] * 100)
+                    if previous["vacancies"] else 0
             },
             "avg_salary": self._calculate_salary_changes(current, previous),
             "top_techs_current": dict(sorted(current_tech_stats.items(), key=lambda x: x[1], reverse=True)[:10]),
             "top_techs_previous": dict(sorted(previous_tech_stats.items(), key=lambda x: x[1], reverse=True)[:10])
         }
 
-    def _calculate_salary_changes(self, current: List[Vacancy], previous: List[Vacancy]) -> Dict:
+    def _calculate_salary_changes(self, current: Dict, previous: Dict) -> Dict:
         """Вычисляет изменения в зарплатах"""
-        def avg_salary(vacancies):
-            salaries_from = [v.salary_from for v in vacancies if v.salary_from]
-            salaries_to = [v.salary_to for v in vacancies if v.salary_to]
+        def avg_salary(summary):
             return {
-                "from": sum(salaries_from) / len(salaries_from) if salaries_from else 0,
-                "to": sum(salaries_to) / len(salaries_to) if salaries_to else 0
+                "from": summary["salary_from"]["avg"] or 0,
+                "to": summary["salary_to"]["avg"] or 0
             }
 
         current_avg = avg_salary(current)
@@ -1,6 +1,5 @@
 import asyncio
 import logging
-import json
 from datetime import datetime
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command, CommandObject
@@ -17,18 +16,22 @@ sys.path.append(root_dir)
 sys.path.append(backend_dir)
 
 # Import project modules
-from storage.database import get_db, engine  # This will now find the root storage first
-from storage.models import Base, Vacancy
+from storage.database import get_db, init_db  # This will now find the root storage first
+from storage.models import Vacancy
 from config import TELEGRAM_BOT_TOKEN, ADMIN_USER_IDS
 from analytics.deepseek_analyzer import DeepseekAnalyzer
 from parsers.hh_parser import HHParser
+from storage.watermarks import get_date_from, save_watermark
+from storage.ingest import upsert_vacancies
+from storage.snapshots import SnapshotStore
+from storage.rollups import rollup_summary
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize database
-Base.metadata.create_all(bind=engine)
+init_db()
 
 # Initialize bot and dispatcher
 bot = Bot(token=TELEGRAM_BOT_TOKEN, parse_mode="HTML")
@@ -53,7 +56,8 @@ async def cmd_help(message: types.Message):
     help_text = (
         "🤖 <b>Доступные команды:</b>\n\n"
         "/collect - Собрать новые вакансии\n"
-        "  Пример: /collect python developer\n\n"
+        "  Пример: /collect python developer\n"
+        "  Полный пересбор: /collect --full python developer\n\n"
         "/analyze - Получить аналитику\n"
         "  Пример: /analyze за неделю\n\n"
         "/export [format] - Выгрузить данные\n"
@@ -71,63 +75,45 @@ async def cmd_collect(message: types.Message, command: CommandObject):
         await message.answer("⛔️ У вас нет прав для выполнения этой команды")
         return
 
-    search_query = command.args if command.args else "python developer"
+    args = command.args.split() if command.args else []
+    full_sync = "--full" in args
+    search_query = " ".join(arg for arg in args if arg != "--full") or "python developer"
+    area = 1
     status_message = await message.answer("🔍 Начинаю сбор вакансий...")
 
     try:
+        db = next(get_db())
         parser = HHParser()
-        vacancies = parser.get_all_vacancies(search_query)
-        
-        if not vacancies:
-            await status_message.edit_text("❌ Не удалось найти вакансии")
-            return
+        date_from = get_date_from(db, search_query, area, full_sync)
 
-        # Сохраняем вакансии в JSON
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = Path("parseddata") / f"vacancies_{timestamp}.json"
-        output_file.parent.mkdir(exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(vacancies, f, ensure_ascii=False, indent=2)
+        # Сохраняем вакансии в снимок и в базу постранично, пока грузятся следующие страницы
+        snapshot = SnapshotStore().open_run(query=search_query, area=area, full_sync=date_from is None)
 
-        # Сохраняем вакансии в базу данных
-        db = next(get_db())
+        total_count = 0
         saved_count = 0
         skipped_count = 0
-        
-        for vacancy_data in vacancies:
-            try:
-                # Проверяем, существует ли вакансия с таким URL
-                existing = db.query(Vacancy).filter(Vacancy.url == vacancy_data['url']).first()
-                if existing:
-                    skipped_count += 1
-                    continue
-                    
-                # Создаем новую вакансию
-                vacancy = Vacancy(
-                    title=vacancy_data['title'],
-                    company=vacancy_data['company'],
-                    city=vacancy_data['city'],
-                    tech_stack=vacancy_data['tech_stack'],
-                    salary_from=vacancy_data['salary_from'],
-                    salary_to=vacancy_data['salary_to'],
-                    currency=vacancy_data['currency'],
-                    url=vacancy_data['url'],
-                    source=vacancy_data['source']
-                )
-                db.add(vacancy)
-                saved_count += 1
-            except Exception as e:
-                logger.error(f"Error saving vacancy: {e}")
-                continue
-        
-        db.commit()
+
+        async for vacancies in parser.aiter_pages(search_query, area, date_from):
+            snapshot.add(vacancies)
+            total_count += len(vacancies)
+
+            counts = upsert_vacancies(db, vacancies, update_existing=False)
+            saved_count += counts["new"]
+            skipped_count += counts["skipped"]
+
+        if not total_count:
+            await status_message.edit_text("❌ Новых вакансий не найдено" if date_from else "❌ Не удалось найти вакансии")
+            return
+
+        run_id = snapshot.commit()
+        save_watermark(db, search_query, area, parser.last_published_at, full_sync=date_from is None,
+                       complete=parser.complete)
 
         await status_message.edit_text(
-            f"✅ Обработано {len(vacancies)} вакансий\n"
+            f"✅ Обработано {total_count} вакансий\n"
             f"📥 Сохранено в БД: {saved_count}\n"
             f"⏭ Пропущено: {skipped_count}\n"
-            f"📁 JSON файл: {output_file.name}"
+            f"📁 Снимок: {run_id} (новых записей: {len(snapshot.new_payloads)})"
         )
     except Exception as e:
         logger.error(f"Error collecting vacancies: {e}")
@@ -206,7 +192,7 @@ async def cmd_stats(message: types.Message):
     """Показать текущую статистику"""
     try:
         db = next(get_db())
-        total_vacancies = db.query(Vacancy).count()
+        total_vacancies = rollup_summary(db)["vacancies"]
         latest_vacancy = db.query(Vacancy).order_by(Vacancy.created_at.desc()).first()
         
         stats = (
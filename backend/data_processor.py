@@ -5,6 +5,13 @@ from datetime import datetime
 from collections import Counter
 from typing import Dict, List, Optional
 import logging
+import sys
+import os
+
+# Add project root to Python path, ahead of backend/storage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.snapshots import SnapshotStore
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -13,20 +20,30 @@ logger = logging.getLogger(__name__)
 class VacancyDataProcessor:
     def __init__(self):
         self.parsed_data_dir = Path("parseddata")
+        self.snapshots = SnapshotStore()
         self.exports_dir = Path("exports")
         self.exports_dir.mkdir(exist_ok=True)
         self.parsed_data_dir.mkdir(exist_ok=True)
 
     def process_latest_data(self) -> Dict:
-        """Обработка последнего файла с вакансиями"""
+        """Обработка последнего снимка вакансий (или последнего JSON файла, если снимков нет)"""
+        run_id = self.snapshots.latest_run()
+        if run_id:
+            return self.process_snapshot(run_id)
+
         latest_file = self._get_latest_file()
         if not latest_file:
-            logger.error("No vacancy files found in parseddata directory")
+            logger.error("No vacancy snapshots or files found in parseddata directory")
             return {}
 
         logger.info(f"Processing file: {latest_file}")
         return self._process_file(latest_file)
 
+    def process_snapshot(self, run_id: str) -> Dict:
+        """Обработка снимка вакансий из хранилища снимков"""
+        logger.info(f"Processing snapshot: {run_id}")
+        return self._process_vacancies(self.snapshots.load(run_id), f"snapshot:{run_id}")
+
     def _get_latest_file(self) -> Optional[Path]:
         """Получение последнего файла с вакансиями"""
         files = list(self.parsed_data_dir.glob("vacancies_*.json"))
@@ -38,12 +55,15 @@ class VacancyDataProcessor:
         """Обработка файла с вакансиями"""
         with open(file_path, 'r', encoding='utf-8') as f:
             vacancies = json.load(f)
+        return self._process_vacancies(vacancies, file_path.name)
 
+    def _process_vacancies(self, vacancies: List[Dict], source_name: str) -> Dict:
+        """Расчет аналитики по списку вакансий"""
         processed_data = {
             "meta": {
                 "total_vacancies": len(vacancies),
                 "processed_at": datetime.now().isoformat(),
-                "source_file": file_path.name
+                "source_file": source_name
             },
             "analytics": {
                 "tech_distribution": self._analyze_technologies(vacancies),
@@ -1,18 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Optional, Union
+import asyncio
 import sys
 import os
 import logging
-from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 from enum import Enum
-from fastapi.responses import FileResponse
-import json
-import pandas as pd
-from pathlib import Path
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from tempfile import NamedTemporaryFile
 
 # Configure logging
@@ -23,11 +21,31 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from storage.database import get_db, init_db
+from storage.database import SessionLocal, get_db, get_async_db, get_async_engine, async_session, dispose_async_engine, init_db
 from storage.models import Vacancy
+from storage.watermarks import get_date_from, save_watermark
+from storage.ingest import upsert_vacancies
+from storage.technologies import RARE_TECHNOLOGY_VACANCIES, has_technology, related_technologies, with_technology
+from storage.rollups import rollup_counts, rollup_summary, rollup_tech_counts
+from storage.search import search_statement
+from storage.pagination import encode_cursor, vacancy_page
+from storage.versions import VersionedCache, get_data_version
+from storage.retention import archive_expired_vacancies
+from storage.export import VACANCY_FIELDS, ExportEncoder, export_statement
+from storage.jobs import JobRunner, job_to_dict
 from parsers.hh_parser import HHParser
+from parsers.hh_enricher import VacancyEnricher
 from analytics.deepseek_analyzer import DeepseekAnalyzer
 
+DEFAULT_SEARCH_QUERY = "python developer"
+DEFAULT_AREA = 1  # Moscow
+
+# Результаты /vacancies/stats до следующего изменения вакансий
+stats_cache = VersionedCache()
+
+# Фоновые задачи сбора вакансий (JOB_WORKERS воркеров, очередь в таблице jobs)
+jobs = JobRunner()
+
 # Модели для документации API
 class VacancyBase(BaseModel):
     title: str = Field(..., description="Название вакансии")
@@ -59,30 +77,46 @@ class VacancyStats(BaseModel):
     tech_stack: Dict[str, int] = Field(..., description="Статистика по технологиям")
     average_salary: AverageSalary = Field(..., description="Средние зарплаты")
 
-class RefreshResponse(BaseModel):
-    message: str = Field(..., description="Сообщение о результате")
-    new_vacancies: int = Field(..., description="Количество новых вакансий")
-    updated_vacancies: int = Field(..., description="Количество обновленных вакансий")
-    skipped_vacancies: int = Field(..., description="Количество пропущенных вакансий")
-    total_processed: int = Field(..., description="Всего обработано вакансий")
+class JobStatus(BaseModel):
+    id: int = Field(..., description="ID задачи")
+    kind: str = Field(..., description="Тип задачи (refresh, collect)")
+    status: str = Field(..., description="queued, running, succeeded или failed")
+    params: Dict = Field(..., description="Параметры задачи")
+    attempts: int = Field(..., description="Количество запусков")
+    progress: Optional[Dict] = Field(None, description="Прогресс: обработанные страницы и вакансии")
+    result: Optional[Dict] = Field(None, description="Результат: количество новых, обновленных и пропущенных вакансий")
+    error: Optional[str] = Field(None, description="Ошибка, если задача завершилась неудачно")
+    created_at: Optional[str] = Field(None, description="Время постановки в очередь")
+    started_at: Optional[str] = Field(None, description="Время запуска")
+    finished_at: Optional[str] = Field(None, description="Время завершения")
+    queued_seconds: Optional[float] = Field(None, description="Время ожидания в очереди, с")
+    run_seconds: Optional[float] = Field(None, description="Время выполнения, с")
+
+class JobSubmitResponse(JobStatus):
+    deduplicated: bool = Field(..., description="Такая задача уже была в очереди или выполнялась")
 
 class CleanupResponse(BaseModel):
     message: str = Field(..., description="Сообщение о результате")
     deleted_count: int = Field(..., description="Количество удаленных вакансий")
+    archived_count: int = Field(..., description="Количество вакансий, сохраненных в архив")
 
 class ExportFormat(str, Enum):
     JSON = "json"
+    NDJSON = "ndjson"
     CSV = "csv"
 
-class ExportResponse(BaseModel):
-    message: str = Field(..., description="Сообщение о результате")
-    file_path: str = Field(..., description="Путь к экспортированному файлу")
-    format: ExportFormat = Field(..., description="Формат экспорта")
-    records_count: int = Field(..., description="Количество экспортированных записей")
-
 class AnalyticsResponse(BaseModel):
     analysis: str = Field(..., description="Аналитический отчет от DeepSeek")
 
+def vacancy_list_response(rows, headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """
+    Список вакансий из строк с колонками VACANCY_COLUMNS в формате VacancyResponse
+    
+    Строки из базы не проверяются повторно через response_model: они сразу
+    сериализуются orjson (даты - в ISO 8601, как isoformat()).
+    """
+    return ORJSONResponse([dict(zip(VACANCY_FIELDS, row)) for row in rows], headers=headers)
+
 app = FastAPI(
     title="Job Market Monitor API",
     description="""
@@ -90,7 +124,8 @@ app = FastAPI(
     
     ## Возможности
     
-    * Получение списка вакансий с пагинацией
+    * Получение списка вакансий с фильтрами и постраничной выдачей по курсору
+    * Полнотекстовый поиск вакансий
     * Статистика по городам, технологиям и зарплатам
     * Обновление базы вакансий
     * Очистка устаревших данных
@@ -114,10 +149,16 @@ async def startup_event():
     try:
         init_db()
         logger.info("Database initialized successfully")
+        jobs.start()
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await jobs.stop()
+    await dispose_async_engine()
+
 @app.get("/")
 async def root():
     """
@@ -127,309 +168,332 @@ async def root():
 
 @app.get("/vacancies/", response_model=List[VacancyResponse], tags=["vacancies"])
 async def get_vacancies(
-    skip: int = Query(0, description="Количество пропускаемых записей"),
-    limit: int = Query(100, description="Максимальное количество возвращаемых записей"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=5000, description="Максимальное количество возвращаемых записей"),
+    city: Optional[str] = Query(None, description="Город"),
+    source: Optional[str] = Query(None, description="Источник (например, hh.ru)"),
+    tech: Optional[str] = Query(None, description="Только вакансии с указанной технологией"),
+    currency: Optional[str] = Query(None, description="Валюта зарплаты (например, RUR)"),
+    salary_min: Optional[float] = Query(None, description="Минимальная зарплата не ниже"),
+    salary_max: Optional[float] = Query(None, description="Минимальная зарплата не выше"),
+    created_from: Optional[datetime] = Query(None, description="Созданы не раньше"),
+    created_to: Optional[datetime] = Query(None, description="Созданы раньше"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Количество пропускаемых записей (используйте cursor)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Получить список вакансий с пагинацией.
+    Получить список вакансий, новые первыми, с постраничной выдачей по курсору.
     
-    - **skip**: количество пропускаемых записей для пагинации
+    - **cursor**: курсор из заголовка X-Next-Cursor предыдущего ответа; без него - первая страница
     - **limit**: максимальное количество возвращаемых записей
+    - **city**, **source**, **tech**, **currency**: фильтры по точному значению
+    - **salary_min**, **salary_max**: диапазон минимальной зарплаты (salary_from)
+    - **created_from**, **created_to**: период создания вакансий
     
-    Возвращает список вакансий с полной информацией.
+    Каждая страница читается по индексу от позиции курсора, поэтому далекие
+    страницы загружаются так же быстро, как первая. Заголовок X-Next-Cursor
+    отсутствует на последней странице.
     """
     try:
-        vacancies = db.query(Vacancy).offset(skip).limit(limit).all()
-        return [
-            {
-                "id": v.id,
-                "title": v.title,
-                "company": v.company,
-                "city": v.city,
-                "tech_stack": v.tech_stack,
-                "salary_from": v.salary_from,
-                "salary_to": v.salary_to,
-                "currency": v.currency,
-                "url": v.url,
-                "source": v.source,
-                "created_at": v.created_at.isoformat() if v.created_at else None,
-                "updated_at": v.updated_at.isoformat() if v.updated_at else None
-            }
-            for v in vacancies
-        ]
+        query = vacancy_page(db.bind.dialect.name, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if city:
+        query = query.where(Vacancy.city == city)
+    if source:
+        query = query.where(Vacancy.source == source)
+    if tech:
+        # Редкие технологии - сначала их вакансии, частые - проверка по ходу чтения индекса
+        tech_vacancies = (await db.run_sync(rollup_summary, technology=tech))["vacancies"]
+        if tech_vacancies < RARE_TECHNOLOGY_VACANCIES:
+            query = query.where(Vacancy.id.in_(with_technology(tech)))
+        else:
+            query = query.where(has_technology(tech))
+    if currency:
+        query = query.where(Vacancy.currency == currency)
+    if salary_min is not None:
+        query = query.where(Vacancy.salary_from >= salary_min)
+    if salary_max is not None:
+        query = query.where(Vacancy.salary_from <= salary_max)
+    if created_from:
+        query = query.where(Vacancy.created_at >= created_from)
+    if created_to:
+        query = query.where(Vacancy.created_at < created_to)
+
+    try:
+        if skip:
+            query = query.offset(skip)
+        rows = (await db.execute(query.limit(limit))).all()
+        headers = {}
+        if len(rows) == limit and rows[-1].cursor_key is not None:
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].cursor_key, rows[-1].id)
+        return vacancy_list_response(rows, headers)
     except Exception as e:
         logger.error(f"Error fetching vacancies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/vacancies/search", response_model=List[VacancyResponse], tags=["vacancies"])
+async def search_vacancies(
+    q: str = Query(..., min_length=1, description="Поисковый запрос, например: senior django"),
+    skip: int = Query(0, ge=0, description="Количество пропускаемых записей"),
+    limit: int = Query(20, ge=1, le=100, description="Максимальное количество возвращаемых записей"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Полнотекстовый поиск вакансий по названию, компании, городу и технологиям.
+    
+    - **q**: слова запроса, ищутся вакансии, содержащие все слова
+    - **skip**, **limit**: пагинация результатов
+    
+    Возвращает вакансии, отсортированные по релевантности.
+    """
+    query = search_statement(db.bind.dialect.name, q, limit, skip)
+    if query is None:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    try:
+        return vacancy_list_response((await db.execute(query)).all())
+    except Exception as e:
+        logger.error(f"Error searching vacancies: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/vacancies/stats", response_model=VacancyStats, tags=["analytics"])
-async def get_vacancy_stats(db: Session = Depends(get_db)):
+async def get_vacancy_stats(db: AsyncSession = Depends(get_async_db)):
     """
     Получить статистику по вакансиям.
     
+    Считается по дневным агрегатам (vacancy_daily_stats), а не по таблице вакансий.
+    
     Возвращает:
     - Общее количество вакансий
     - Распределение по городам
     - Статистику по технологиям
     - Средние зарплаты
+    
+    Результат кэшируется в памяти до следующего изменения данных (data_versions).
     """
-    try:
-        total_vacancies = db.query(func.count(Vacancy.id)).scalar()
-        
-        cities = db.query(
-            Vacancy.city,
-            func.count(Vacancy.id).label('count')
-        ).group_by(Vacancy.city).all()
-        
-        tech_stats = {}
-        vacancies = db.query(Vacancy.tech_stack).all()
-        for vacancy in vacancies:
-            if vacancy.tech_stack:
-                for tech in vacancy.tech_stack.split(','):
-                    tech = tech.strip()
-                    if tech:
-                        tech_stats[tech] = tech_stats.get(tech, 0) + 1
-        
-        avg_salary = db.query(
-            func.avg(Vacancy.salary_from).label('avg_from'),
-            func.avg(Vacancy.salary_to).label('avg_to')
-        ).first()
+    async def compute_stats():
+        summary = await db.run_sync(rollup_summary)
+        cities = await db.run_sync(rollup_counts, "city")
+        tech_stats = await db.run_sync(rollup_tech_counts)
+        avg_from = summary["salary_from"]["avg"]
+        avg_to = summary["salary_to"]["avg"]
         
         return {
-            "total_vacancies": total_vacancies,
-            "cities": [{"city": city, "count": count} for city, count in cities],
+            "total_vacancies": summary["vacancies"],
+            "cities": [{"city": city, "count": count} for city, count in cities.items()],
             "tech_stack": tech_stats,
             "average_salary": {
-                "from": round(avg_salary.avg_from, 2) if avg_salary.avg_from else None,
-                "to": round(avg_salary.avg_to, 2) if avg_salary.avg_to else None
+                "from": round(avg_from, 2) if avg_from else None,
+                "to": round(avg_to, 2) if avg_to else None
             }
         }
+
+    try:
+        version = await db.run_sync(get_data_version)
+        return await stats_cache.get("stats", version, compute_stats)
     except Exception as e:
         logger.error(f"Error fetching stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/vacancies/refresh", response_model=RefreshResponse, tags=["maintenance"])
-async def refresh_vacancies(db: Session = Depends(get_db)):
+async def crawl_vacancies(params: Dict, report_progress) -> Dict:
+    """Сбор вакансий по запросу (задачи refresh и collect): страницы сохраняются по мере загрузки"""
+    query, area = params["query"], params["area"]
+    parser = HHParser()
+    enricher = VacancyEnricher(parser) if params.get("enrich") else None
+    counts = {"pages": 0, "failed_pages": 0, "truncated_results": 0, "total_processed": 0, "new_vacancies": 0, "updated_vacancies": 0, "skipped_vacancies": 0}
+    
+    async with async_session() as db:
+        date_from = await db.run_sync(get_date_from, query, area, params.get("full", False))
+        logger.info(f"Starting to fetch vacancies from HH.ru (date_from={date_from})")
+        
+        # Each page is stored while the next ones are still downloading
+        async for vacancies in parser.aiter_pages(query, area, date_from):
+            if enricher:
+                await enricher.enrich_async(vacancies)
+            page_counts = await db.run_sync(upsert_vacancies, vacancies)
+            counts["pages"] += 1
+            counts["failed_pages"] = parser.failed_pages
+            counts["truncated_results"] = parser.truncated_results
+            counts["total_processed"] += len(vacancies)
+            counts["new_vacancies"] += page_counts["new"]
+            counts["updated_vacancies"] += page_counts["updated"]
+            counts["skipped_vacancies"] += page_counts["skipped"]
+            await report_progress(dict(counts))
+        
+        # Пропущенные страницы и результаты сверх лимита будут загружены заново при следующем сборе
+        counts["failed_pages"] = parser.failed_pages
+        counts["truncated_results"] = parser.truncated_results
+        await db.run_sync(save_watermark, query, area, parser.last_published_at,
+                          full_sync=date_from is None, complete=parser.complete)
+    
+    logger.info(
+        f"Fetched {counts['total_processed']} vacancies from HH.ru: "
+        f"added {counts['new_vacancies']} new vacancies, "
+        f"updated {counts['updated_vacancies']} existing vacancies, "
+        f"skipped {counts['skipped_vacancies']} unchanged vacancies"
+    )
+    return {
+        "message": f"Added {counts['new_vacancies']} new vacancies, updated {counts['updated_vacancies']} existing ones",
+        **counts
+    }
+
+jobs.handler("refresh")(crawl_vacancies)
+jobs.handler("collect")(crawl_vacancies)
+
+async def submit_crawl(kind: str, response: Response, full: bool, enrich: bool = False) -> Dict:
+    params = {"query": DEFAULT_SEARCH_QUERY, "area": DEFAULT_AREA, "full": full, "enrich": enrich}
+    # Один активный сбор на запрос и режим: повторные вызовы получают уже запущенную задачу,
+    # а полный сбор или сбор с описаниями не подменяется обычным
+    dedup_key = f"crawl:{DEFAULT_SEARCH_QUERY}:{DEFAULT_AREA}:full={int(full)}:enrich={int(enrich)}"
+    job, created = await jobs.submit(kind, dedup_key, params)
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return {**job_to_dict(job), "deduplicated": not created}
+
+@app.post("/vacancies/refresh", response_model=JobSubmitResponse, status_code=202, tags=["maintenance"])
+async def refresh_vacancies(
+    response: Response,
+    full: bool = Query(False, description="Полная пересинхронизация вместо инкрементального сбора"),
+    enrich: bool = Query(False, description="Загружать полные описания вакансий для поиска технологий")
+):
     """
-    Обновить базу вакансий.
+    Поставить в очередь обновление базы вакансий.
     
     - Собирает новые вакансии с поддерживаемых платформ
     - Обновляет существующие вакансии
-    - Возвращает статистику по обработанным вакансиям
+    - **full**: игнорировать отметку последнего сбора и загрузить всё заново
+    - **enrich**: дополнить технологии из key_skills и полного описания вакансий
+    
+    Возвращает задачу сразу; ход сбора и статистика по вакансиям — в GET /jobs/{id}.
+    Если такой же сбор (запрос, full, enrich) уже в очереди или выполняется, возвращается он (deduplicated=true).
     """
     try:
-        parser = HHParser()
-        logger.info("Starting to fetch vacancies from HH.ru")
-        vacancies = parser.get_all_vacancies()
-        logger.info(f"Fetched {len(vacancies)} vacancies from HH.ru")
-        
-        new_vacancies = 0
-        updated_vacancies = 0
-        skipped_vacancies = 0
-        
-        for vacancy_data in vacancies:
-            try:
-                existing = db.query(Vacancy).filter(Vacancy.url == vacancy_data["url"]).first()
-                
-                if existing:
-                    has_changes = False
-                    for key, value in vacancy_data.items():
-                        if key not in ['created_at', 'updated_at'] and getattr(existing, key) != value:
-                            setattr(existing, key, value)
-                            has_changes = True
-                    
-                    if has_changes:
-                        existing.updated_at = datetime.now()
-                        updated_vacancies += 1
-                    else:
-                        skipped_vacancies += 1
-                else:
-                    vacancy = Vacancy(**vacancy_data)
-                    db.add(vacancy)
-                    new_vacancies += 1
-                    
-                if (new_vacancies + updated_vacancies) % 100 == 0:
-                    db.commit()
-                    
-            except IntegrityError as e:
-                logger.warning(f"Duplicate vacancy found: {vacancy_data.get('url')}")
-                db.rollback()
-                skipped_vacancies += 1
-                continue
-            except Exception as e:
-                logger.error(f"Error processing vacancy {vacancy_data.get('url')}: {str(e)}")
-                db.rollback()
-                continue
-        
-        db.commit()
-        
-        logger.info(
-            f"Successfully added {new_vacancies} new vacancies, "
-            f"updated {updated_vacancies} existing vacancies, "
-            f"skipped {skipped_vacancies} unchanged vacancies"
-        )
-        
-        return {
-            "message": f"Added {new_vacancies} new vacancies, updated {updated_vacancies} existing ones",
-            "new_vacancies": new_vacancies,
-            "updated_vacancies": updated_vacancies,
-            "skipped_vacancies": skipped_vacancies,
-            "total_processed": len(vacancies)
-        }
+        return await submit_crawl("refresh", response, full, enrich)
     except Exception as e:
         logger.error(f"Error refreshing vacancies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/vacancies/cleanup", response_model=CleanupResponse, tags=["maintenance"])
 async def cleanup_old_vacancies(
-    days: int = Query(30, description="Удалить вакансии старше указанного количества дней"),
-    db: Session = Depends(get_db)
+    days: int = Query(30, description="Удалить вакансии старше указанного количества дней")
 ):
     """
     Удалить старые вакансии из базы данных.
     
     - **days**: количество дней, старше которых вакансии будут удалены (по умолчанию 30)
     
-    Возвращает количество удаленных вакансий.
+    Перед удалением вакансии сохраняются в Parquet-архив (ARCHIVE_DIR).
+    Удаление идет пачками по RETENTION_BATCH_SIZE в коротких транзакциях.
+    Запись архива выполняется в отдельном потоке и не блокирует остальные запросы.
+    
+    Возвращает количество удаленных и заархивированных вакансий.
     """
+    def archive(cutoff_date: datetime) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return archive_expired_vacancies(db, cutoff_date)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     try:
         cutoff_date = datetime.now() - timedelta(days=days)
-        deleted_count = db.query(Vacancy).filter(
-            Vacancy.updated_at < cutoff_date
-        ).delete(synchronize_session=False)
+        # run_sync выполняется в потоке event loop, а Parquet и fsync блокируют
+        stats = await asyncio.to_thread(archive, cutoff_date)
+        deleted_count = stats["deleted"]
         
-        db.commit()
         logger.info(f"Deleted {deleted_count} old vacancies")
         return {
             "message": f"Successfully deleted {deleted_count} vacancies older than {days} days",
-            "deleted_count": deleted_count
+            "deleted_count": deleted_count,
+            "archived_count": stats["archived"]
         }
     except Exception as e:
         logger.error(f"Error cleaning up old vacancies: {str(e)}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/vacancies/collect", response_model=RefreshResponse, tags=["data"])
-async def collect_vacancies(db: Session = Depends(get_db)):
+@app.post("/vacancies/collect", response_model=JobSubmitResponse, status_code=202, tags=["data"])
+async def collect_vacancies(
+    response: Response,
+    full: bool = Query(False, description="Полная пересинхронизация вместо инкрементального сбора")
+):
     """
-    Запустить однократный сбор вакансий со всех источников
+    Поставить в очередь однократный сбор вакансий со всех источников
+    
+    Возвращает задачу сразу; ход сбора — в GET /jobs/{id}.
     """
     try:
-        parser = HHParser()
-        new_count = 0
-        updated_count = 0
-        skipped_count = 0
-        total_count = 0
-
-        vacancies = parser.get_all_vacancies()
-        
-        for vacancy_data in vacancies:
-            total_count += 1
-            existing = db.query(Vacancy).filter(Vacancy.url == vacancy_data['url']).first()
-            
-            if not existing:
-                vacancy = Vacancy(
-                    title=vacancy_data['title'],
-                    company=vacancy_data['company'],
-                    city=vacancy_data.get('city'),
-                    tech_stack=vacancy_data.get('tech_stack'),
-                    salary_from=vacancy_data.get('salary_from'),
-                    salary_to=vacancy_data.get('salary_to'),
-                    currency=vacancy_data.get('currency'),
-                    url=vacancy_data['url'],
-                    source=vacancy_data['source']
-                )
-                db.add(vacancy)
-                new_count += 1
-            else:
-                # Обновляем существующую вакансию если есть изменения
-                was_updated = False
-                for field in ['title', 'company', 'city', 'tech_stack', 'salary_from', 'salary_to', 'currency']:
-                    if getattr(existing, field) != vacancy_data.get(field):
-                        setattr(existing, field, vacancy_data.get(field))
-                        was_updated = True
-                
-                if was_updated:
-                    existing.updated_at = datetime.now()
-                    updated_count += 1
-                else:
-                    skipped_count += 1
-        
-        db.commit()
-        
-        return {
-            "message": "Сбор вакансий успешно завершен",
-            "new_vacancies": new_count,
-            "updated_vacancies": updated_count,
-            "skipped_vacancies": skipped_count,
-            "total_processed": total_count
-        }
+        return await submit_crawl("collect", response, full)
     except Exception as e:
         logger.error(f"Error collecting vacancies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/vacancies/export", response_model=ExportResponse, tags=["data"])
+@app.get("/jobs/{job_id}", response_model=JobStatus, tags=["maintenance"])
+async def get_job_status(job_id: int):
+    """
+    Состояние фоновой задачи: статус (queued, running, succeeded, failed),
+    прогресс, результат или ошибка, время в очереди и время выполнения
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_to_dict(job)
+
+@app.get("/vacancies/export", response_class=StreamingResponse, tags=["data"])
 async def export_vacancies(
-    format: ExportFormat = Query(ExportFormat.JSON, description="Формат экспорта (json или csv)"),
+    format: ExportFormat = Query(ExportFormat.JSON, description="Формат экспорта (json, ndjson или csv)"),
     days: int = Query(3, description="Количество дней для выгрузки"),
-    db: Session = Depends(get_db)
+    gzip: bool = Query(False, description="Сжать ответ (Content-Encoding: gzip)")
+):
+    """
+    Выгрузить вакансии за последние `days` дней в JSON, NDJSON или CSV
+    
+    Ответ передается потоком по мере чтения вакансий из базы (по EXPORT_BATCH_SIZE строк),
+    поэтому память сервера не зависит от размера выгрузки, а первые данные приходят сразу.
+    Ошибка посреди выгрузки обрывает соединение.
+    """
+    encoder = ExportEncoder(format.value, compress=gzip)
+    cutoff_date = datetime.now() - timedelta(days=days)
+
+    async def export_chunks():
+        yield encoder.start()
+        try:
+            # Своё соединение: сессия из Depends закрывается раньше, чем заканчивается поток
+            async with get_async_engine().connect() as conn:
+                result = await conn.stream(export_statement(cutoff_date))
+                async for rows in result.mappings().partitions():
+                    yield encoder.encode(rows)
+        except Exception as e:
+            logger.error(f"Error exporting vacancies: {str(e)}")
+            raise
+        yield encoder.finish()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    headers = {"Content-Disposition": f'attachment; filename="vacancies_{timestamp}.{format.value}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_chunks(), media_type=encoder.media_type, headers=headers)
+
+@app.get("/technologies/{name}/related", response_model=Dict[str, int], tags=["analytics"])
+async def get_related_technologies(
+    name: str,
+    limit: int = Query(20, description="Максимальное количество технологий"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Экспортировать вакансии в JSON или CSV формат
+    Технологии, которые чаще всего требуются вместе с указанной.
+    
+    Возвращает количество вакансий, где обе технологии встречаются вместе.
     """
     try:
-        # Создаем директорию для экспорта если её нет
-        export_dir = Path("exports")
-        export_dir.mkdir(exist_ok=True)
-        
-        # Получаем вакансии за указанный период
-        cutoff_date = datetime.now() - timedelta(days=days)
-        vacancies = db.query(Vacancy).filter(
-            Vacancy.created_at >= cutoff_date
-        ).all()
-        
-        # Преобразуем вакансии в список словарей
-        vacancy_data = []
-        for v in vacancies:
-            vacancy_dict = {
-                "id": v.id,
-                "title": v.title,
-                "company": v.company,
-                "city": v.city,
-                "tech_stack": v.tech_stack,
-                "salary_from": v.salary_from,
-                "salary_to": v.salary_to,
-                "currency": v.currency,
-                "url": v.url,
-                "source": v.source,
-                "created_at": v.created_at.isoformat() if v.created_at else None,
-                "updated_at": v.updated_at.isoformat() if v.updated_at else None
-            }
-            vacancy_data.append(vacancy_dict)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format == ExportFormat.JSON:
-            file_path = export_dir / f"vacancies_{timestamp}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(vacancy_data, f, ensure_ascii=False, indent=2)
-        else:  # CSV
-            file_path = export_dir / f"vacancies_{timestamp}.csv"
-            df = pd.DataFrame(vacancy_data)
-            df.to_csv(file_path, index=False, encoding="utf-8")
-        
-        return {
-            "message": f"Данные успешно экспортированы в {format.value} формат",
-            "file_path": str(file_path),
-            "format": format,
-            "records_count": len(vacancy_data)
-        }
+        return await db.run_sync(related_technologies, name, limit)
     except Exception as e:
-        logger.error(f"Error exporting vacancies: {str(e)}")
+        logger.error(f"Error fetching related technologies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/analytics/market-insights", response_model=AnalyticsResponse, tags=["analytics"])
-async def get_market_insights(db: Session = Depends(get_db)):
+def get_market_insights(db: Session = Depends(get_db)):
     """
     Получить аналитический отчет о рынке вакансий за последнюю неделю.
     
@@ -438,6 +502,9 @@ async def get_market_insights(db: Session = Depends(get_db)):
     - Региональный анализ спроса
     - Изменения по сравнению с прошлой неделей
     - Рекомендации для разработчиков разного уровня
+    
+    Обычная (не async) функция: анализатор синхронно обращается к базе и к
+    DeepSeek API, поэтому FastAPI выполняет её в пуле потоков.
     """
     try:
         analyzer = DeepseekAnalyzer()
@@ -0,0 +1,113 @@
+import abc
+import hashlib
+import importlib
+import json
+import logging
+from typing import Dict, List, Iterator, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+# Modules that register parsers when imported
+PARSER_MODULES = [
+    "parsers.hh_parser",
+]
+
+PARSER_REGISTRY: Dict[str, Type["BaseParser"]] = {}
+
+# Vacancy fields covered by the content fingerprint (the url is the key)
+FINGERPRINT_FIELDS = ("title", "company", "city", "tech_stack", "salary_from", "salary_to",
+                      "currency", "source")
+
+
+def register_parser(source: str):
+    """
+    Class decorator adding a parser to the registry under its source name
+    """
+    def decorator(cls: Type["BaseParser"]) -> Type["BaseParser"]:
+        cls.source = source
+        PARSER_REGISTRY[source] = cls
+        return cls
+    return decorator
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        # 100000 from the API and 100000.0 from the database hash the same
+        return int(value)
+    return value
+
+
+def vacancy_fingerprint(vacancy: Dict) -> str:
+    """
+    Stable hash of the stored fields of a parsed vacancy
+
+    Two payloads with the same fingerprint would store the same row, so a
+    vacancy whose stored content_hash matches can be skipped on refresh.
+    """
+    payload = [_normalize(vacancy.get(field)) for field in FINGERPRINT_FIELDS]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class BaseParser(abc.ABC):
+    """
+    Interface of a job source parser
+
+    Parsers yield vacancies as dicts with the Vacancy columns (title,
+    company, city, tech_stack, salary_from, salary_to, currency, url,
+    source, content_hash = vacancy_fingerprint()). Incremental crawling
+    is optional: parsers that support it honour `date_from` and expose
+    the newest publication time they saw in `last_published_at`. Pages
+    that could not be fetched are counted in `failed_pages`, results the
+    source found but would not return in `truncated_results`; the
+    watermark must not be advanced past a crawl that is not `complete`.
+    """
+    source: str = ""
+
+    def __init__(self, **kwargs):
+        self.last_published_at: Optional[str] = None
+        self.failed_pages = 0
+        self.truncated_results = 0
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether the crawl fetched every vacancy the source found
+        """
+        return not self.failed_pages and not self.truncated_results
+
+    @abc.abstractmethod
+    def iter_pages(self,
+                   search_query: str = "python developer",
+                   area: int = 1,
+                   date_from: Optional[str] = None) -> Iterator[List[Dict]]:
+        """
+        Yield parsed vacancies page by page
+        """
+
+    def get_all_vacancies(self, search_query: str = "python developer", **kwargs) -> List[Dict]:
+        """
+        Fetch all vacancies at once
+        """
+        all_vacancies = []
+        for page in self.iter_pages(search_query, **kwargs):
+            all_vacancies.extend(page)
+        return all_vacancies
+
+
+def create_parsers(**kwargs) -> Dict[str, BaseParser]:
+    """
+    Instantiate every registered parser, keyed by source name
+    """
+    for module in PARSER_MODULES:
+        importlib.import_module(module)
+
+    parsers = {}
+    for source, parser_cls in PARSER_REGISTRY.items():
+        try:
+            parsers[source] = parser_cls(**kwargs)
+        except Exception as e:
+            logger.error(f"Failed to create parser for {source}: {str(e)}")
+    return parsers
@@ -0,0 +1,198 @@
+import asyncio
+import aiohttp
+import hashlib
+import json
+import os
+import sys
+import threading
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.base import vacancy_fingerprint
+from parsers.hh_parser import HHParser
+from parsers.rate_limiter import parse_retry_after
+from parsers.tech_matcher import extract_tech_stack
+
+logger = logging.getLogger(__name__)
+
+
+class VacancyEnricher:
+    """
+    Extends tech_stack of parsed vacancies with full vacancy details
+
+    Details (/vacancies/{id}) are fetched by a pool of `workers` coroutines
+    sharing one aiohttp session and the parser's rate limiter, so detail
+    and search requests draw from the same per-host budget. Skills found
+    in key_skills and the description are cached per vacancy id together
+    with a hash of the parsed vacancy, so a vacancy is fetched again only
+    when its search data changed.
+    """
+
+    def __init__(self,
+                 parser: Optional[HHParser] = None,
+                 workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None):
+        self.parser = parser or HHParser()
+        self.workers = workers or int(os.getenv("HH_DETAIL_WORKERS", "8"))
+        self.cache_dir = Path(cache_dir or os.getenv("HH_DETAIL_CACHE_DIR", ".cache/hh_details"))
+
+    @staticmethod
+    def vacancy_id(vacancy: Dict) -> Optional[str]:
+        """HH.ru vacancy id taken from the vacancy URL (https://hh.ru/vacancy/<id>)"""
+        url = (vacancy.get("url") or "").rstrip("/")
+        vacancy_id = url.rsplit("/", 1)[-1].split("?", 1)[0]
+        return vacancy_id if vacancy_id.isdigit() else None
+
+    @staticmethod
+    def _version(vacancy: Dict) -> str:
+        """Hash of the search data, a changed hash means the details may have changed"""
+        payload = {k: v for k, v in vacancy.items() if k not in ("tech_stack", "content_hash")}
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, vacancy_id: str) -> Path:
+        return self.cache_dir / vacancy_id[-2:] / f"{vacancy_id}.json"
+
+    def _cached_skills(self, vacancy_id: str, version: str) -> Optional[List[str]]:
+        try:
+            with open(self._cache_path(vacancy_id), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["skills"] if entry.get("version") == version else None
+
+    def _store_skills(self, vacancy_id: str, version: str, skills: List[str]) -> None:
+        path = self._cache_path(vacancy_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, so concurrent processes never share a temporary file
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "skills": skills}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _apply_cached(self, vacancies: List[Dict], stats: Dict[str, int]) -> List[Tuple[Dict, str, str]]:
+        """
+        Merge cached skills into the vacancies that have them
+
+        Returns (vacancy, vacancy id, version) of the vacancies to fetch.
+        """
+        missing = []
+        for vacancy in vacancies:
+            vacancy_id = self.vacancy_id(vacancy)
+            if not vacancy_id:
+                continue
+            version = self._version(vacancy)
+            skills = self._cached_skills(vacancy_id, version)
+            if skills is not None:
+                self._merge(vacancy, skills)
+                stats["cached"] += 1
+            else:
+                missing.append((vacancy, vacancy_id, version))
+        return missing
+
+    def _store_details(self, vacancy_id: str, version: str, details: Dict) -> List[str]:
+        """Extract the skills of fetched details and cache them"""
+        skills = self.extract_skills(details)
+        self._store_skills(vacancy_id, version, skills)
+        return skills
+
+    @staticmethod
+    def extract_skills(details: Dict) -> List[str]:
+        """Technologies listed in key_skills and mentioned in the description"""
+        key_skills = " , ".join(skill.get("name", "") for skill in details.get("key_skills") or [])
+        description = BeautifulSoup(details.get("description") or "", "html.parser").get_text(" ")
+        return extract_tech_stack(f"{key_skills} , {description}")
+
+    async def _fetch_details(self, session: aiohttp.ClientSession, vacancy_id: str) -> Optional[Dict]:
+        url = f"{self.parser.BASE_URL}/{vacancy_id}"
+        limiter = self.parser.rate_limiter
+        for attempt in range(self.parser.max_retries + 1):
+            try:
+                async with limiter.slot_async():
+                    async with session.get(url) as response:
+                        if response.status == 404:
+                            # Archived or removed vacancy, cache it as having no details
+                            return {}
+                        if response.status in self.parser.THROTTLE_STATUSES:
+                            limiter.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+                            logger.warning(f"HH.ru throttled vacancy {vacancy_id} ({response.status})")
+                        elif response.status >= 500:
+                            logger.warning(f"HH.ru failed on vacancy {vacancy_id} ({response.status})")
+                        else:
+                            response.raise_for_status()
+                            limiter.on_success()
+                            return await response.json()
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"Error fetching vacancy {vacancy_id}: {str(e)}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Error fetching vacancy {vacancy_id}: {str(e)}")
+
+            if attempt < self.parser.max_retries:
+                await asyncio.sleep(limiter.backoff(attempt))
+
+        logger.error(f"Giving up on vacancy {vacancy_id} after {self.parser.max_retries} retries")
+        return None
+
+    async def enrich_async(self, vacancies: List[Dict]) -> Dict[str, int]:
+        """
+        Merge detail skills into tech_stack of every vacancy, in place
+
+        Returns how many vacancies were fetched, served from cache or failed.
+        Cache files and HTML descriptions are read, parsed and written in
+        worker threads, off the event loop.
+        """
+        stats = {"fetched": 0, "cached": 0, "failed": 0}
+        queue: asyncio.Queue = asyncio.Queue()
+
+        for item in await asyncio.to_thread(self._apply_cached, vacancies, stats):
+            queue.put_nowait(item)
+
+        if queue.empty():
+            return stats
+
+        async def worker(session: aiohttp.ClientSession):
+            while True:
+                try:
+                    vacancy, vacancy_id, version = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                details = await self._fetch_details(session, vacancy_id)
+                if details is None:
+                    stats["failed"] += 1
+                    continue
+                skills = await asyncio.to_thread(self._store_details, vacancy_id, version, details)
+                self._merge(vacancy, skills)
+                stats["fetched"] += 1
+
+        connector = aiohttp.TCPConnector(limit=self.workers)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(headers=self.parser.headers,
+                                         connector=connector,
+                                         timeout=timeout) as session:
+            await asyncio.gather(*(worker(session) for _ in range(min(self.workers, queue.qsize()))))
+
+        logger.info(
+            f"Enriched vacancies: {stats['fetched']} fetched, "
+            f"{stats['cached']} from cache, {stats['failed']} failed"
+        )
+        return stats
+
+    def enrich(self, vacancies: List[Dict]) -> Dict[str, int]:
+        """Blocking wrapper around enrich_async"""
+        return asyncio.run(self.enrich_async(vacancies))
+
+    @staticmethod
+    def _merge(vacancy: Dict, skills: List[str]) -> None:
+        tech_stack = [t for t in (vacancy.get("tech_stack") or "").split(",") if t]
+        for skill in skills:
+            if skill not in tech_stack:
+                tech_stack.append(skill)
+        vacancy["tech_stack"] = ",".join(tech_stack)
+        vacancy["content_hash"] = vacancy_fingerprint(vacancy)
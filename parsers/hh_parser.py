@@ -1,57 +1,198 @@
+import asyncio
+import aiohttp
 import requests
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Iterator, AsyncIterator
 import os
+import sys
 from dotenv import load_dotenv
 import logging
 
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.base import BaseParser, register_parser, vacancy_fingerprint
+from parsers.tech_matcher import extract_tech_stack
+from parsers.http_cache import ResponseCache, OfflineCacheMiss
+from parsers.rate_limiter import get_rate_limiter, parse_retry_after
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-class HHParser:
+@register_parser("hh.ru")
+class HHParser(BaseParser):
     BASE_URL = "https://api.hh.ru/vacancies"
+    MAX_PAGES = 20  # HH.ru limits to 2000 vacancies (20 pages * 100 items)
+    RESULT_CAP = 2000
+    # Smallest publication window a sharded crawl will bisect down to
+    MIN_SHARD_WINDOW = timedelta(hours=1)
+    EXPERIENCE_LEVELS = ["noExperience", "between1And3", "between3And6", "moreThan6"]
+    # Responses that mean "slow down" rather than "failed"
+    THROTTLE_STATUSES = (429, 503)
     
-    def __init__(self):
+    def __init__(self,
+                 session: Optional[requests.Session] = None,
+                 concurrency: int = 5,
+                 cache: Optional[ResponseCache] = None):
         self.headers = {
             "User-Agent": "JobMonitor/1.0 (your@email.com)",
             "HH-User-Agent": "JobMonitor/1.0 (your@email.com)"
         }
         self.api_key = os.getenv("HH_API_KEY")
+        # Pooled session so consecutive pages reuse the same connection
+        self.session = session or requests.Session()
+        # Maximum number of pages fetched at once in async mode
+        self.concurrency = concurrency
+        # Newest `published_at` seen by this parser, used as crawl watermark
+        self.last_published_at: Optional[str] = None
+        # Pages given up on; a crawl with failed pages must not advance the watermark
+        self.failed_pages = 0
+        # Results found beyond RESULT_CAP that could not be fetched, same consequence
+        self.truncated_results = 0
+        # Response cache shared by sync and async fetches, see HH_CACHE_* settings
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        # Throttling shared by every request to the API host, see API_* settings
+        self.rate_limiter = get_rate_limiter(self.BASE_URL)
+        self.max_retries = int(os.getenv("API_MAX_RETRIES", "5"))
+        # Durations (seconds) of the last successful page requests, for benchmarks
+        self.page_timings: deque = deque(maxlen=10000)
 
-    def get_vacancies(self, 
-                     text: str = "python developer",
-                     area: int = 1,  # 1 is Moscow
-                     per_page: int = 100,
-                     page: int = 0) -> List[Dict]:
+    def _build_params(self,
+                      text: str = "python developer",
+                      area: int = 1,
+                      per_page: int = 100,
+                      page: int = 0,
+                      date_from: Optional[str] = None) -> Dict:
         """
-        Fetch vacancies from HH.ru API
+        Build query parameters for the vacancy search endpoint
         """
         params = {
             "text": text,
             "area": area,
             "per_page": per_page,
             "page": page,
-            "only_with_salary": True
+            "only_with_salary": "true"
         }
+        if date_from:
+            params["date_from"] = date_from
+        return params
+
+    @staticmethod
+    def parse_published_at(value: str) -> datetime:
+        """
+        Parse HH.ru timestamps such as 2025-06-02T12:00:00+0300
+        """
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+
+    def get_vacancies(self, 
+                     text: str = "python developer",
+                     area: int = 1,  # 1 is Moscow
+                     per_page: int = 100,
+                     page: int = 0,
+                     date_from: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch vacancies from HH.ru API
+        """
+        params = self._build_params(text, area, per_page, page, date_from)
+        data = self._fetch_page(params)
+        if page == 0:
+            self._check_result_cap(data, params)
+        return data.get("items", [])
 
+    def _fetch_page(self, params: Dict) -> Dict:
+        """
+        Fetch a single search page, returns the raw response body or {} on error
+
+        Throttling responses, server errors and connection errors are retried
+        up to max_retries times with jittered exponential backoff, every
+        attempt going through the host's shared rate limiter.
+        """
         try:
-            logger.info(f"Fetching vacancies from HH.ru (page {page})")
-            response = requests.get(
-                self.BASE_URL,
-                headers=self.headers,
-                params=params
+            key, cached, validators = self._cache_lookup(params)
+        except OfflineCacheMiss as e:
+            logger.warning(str(e))
+            return self._failed_page()
+        if cached is not None:
+            logger.info(f"Using cached vacancies from HH.ru (page {params['page']})")
+            return cached
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.rate_limiter.slot():
+                    logger.info(f"Fetching vacancies from HH.ru (page {params['page']})")
+                    started = time.perf_counter()
+                    response = self.session.get(
+                        self.BASE_URL,
+                        headers={**self.headers, **validators},
+                        params=params,
+                        timeout=30
+                    )
+                if response.status_code in self.THROTTLE_STATUSES:
+                    self.rate_limiter.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+                    logger.warning(f"HH.ru throttled page {params['page']} ({response.status_code})")
+                elif response.status_code >= 500:
+                    logger.warning(f"HH.ru failed on page {params['page']} ({response.status_code})")
+                else:
+                    response.raise_for_status()
+                    self.rate_limiter.on_success()
+                    if response.status_code == 304:
+                        data = self.cache.revalidated(key)
+                    else:
+                        data = response.json()
+                        if self.cache:
+                            self.cache.store(key, data, response.headers)
+                    self.page_timings.append(time.perf_counter() - started)
+                    logger.info(f"Successfully fetched {len(data.get('items', []))} vacancies")
+                    return data
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                logger.warning(f"Error fetching vacancies: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error fetching vacancies: {str(e)}")
+                return self._failed_page()
+
+            if attempt < self.max_retries:
+                time.sleep(self.rate_limiter.backoff(attempt))
+
+        logger.error(f"Giving up on page {params['page']} after {self.max_retries} retries")
+        return self._failed_page()
+
+    def _failed_page(self) -> Dict:
+        """
+        Count a page that could not be fetched and return it as empty
+        """
+        self.failed_pages += 1
+        return {}
+
+    def _check_result_cap(self, first_page: Dict, params: Dict) -> None:
+        """
+        Count the results of a query beyond RESULT_CAP, which hh.ru never returns
+
+        Those vacancies are not fetched, so the crawl is not complete and must
+        not advance the watermark past them.
+        """
+        found = first_page.get("found", 0)
+        if found > self.RESULT_CAP:
+            self.truncated_results += found - self.RESULT_CAP
+            logger.warning(
+                f"Query {params} found {found} vacancies, "
+                f"only the first {self.RESULT_CAP} will be collected"
             )
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully fetched {len(data.get('items', []))} vacancies")
-            return data.get("items", [])
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching vacancies: {str(e)}")
-            return []
+
+    def _cache_lookup(self, params: Dict):
+        """
+        Look a search request up in the response cache (no-op without a cache)
+        """
+        if not self.cache:
+            return None, None, {}
+        return self.cache.lookup(self.BASE_URL, params)
 
     def parse_vacancy(self, vacancy_data: Dict) -> Dict:
         """
@@ -71,41 +212,13 @@ class HHParser:
             
             # Combine text fields for tech detection
             full_text = f"{requirement} {responsibility}"
-            tech_stack = []
-            
-            # Common tech stack keywords
-            tech_keywords = [
-                # Languages
-                "python", "java", "javascript", "typescript", "go", "golang", "rust", "c++", "c#", "php",
-                
-                # Frontend
-                "react", "vue", "angular", "html", "css", "sass", "less", "tailwind", "bootstrap",
-                
-                # Backend
-                "django", "flask", "fastapi", "spring", "node.js", "express", "laravel",
-                
-                # Databases
-                "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "sqlite",
-                
-                # Cloud & DevOps
-                "docker", "kubernetes", "aws", "azure", "gcp", "git",
-                
-                # AI/ML
-                "tensorflow", "pytorch", "pandas", "numpy", "opencv", "keras",
-                
-                # Testing
-                "pytest", "selenium", "cypress", "postman"
-            ]
-            
-            for tech in tech_keywords:
-                if tech in full_text:
-                    tech_stack.append(tech)
+            tech_stack = extract_tech_stack(full_text)
 
             parsed_data = {
                 "title": vacancy_data.get("name"),
                 "company": vacancy_data.get("employer", {}).get("name"),
                 "city": vacancy_data.get("area", {}).get("name"),
-                "tech_stack": ",".join(set(tech_stack)),  # Remove duplicates
+                "tech_stack": ",".join(tech_stack),
                 "salary_from": salary.get("from"),
                 "salary_to": salary.get("to"),
                 "currency": salary.get("currency"),
@@ -117,39 +230,348 @@ class HHParser:
             if not parsed_data["title"] or not parsed_data["company"] or not parsed_data["url"]:
                 logger.warning(f"Skipping vacancy due to missing required fields: {parsed_data}")
                 return None
-                
+            
+            parsed_data["content_hash"] = vacancy_fingerprint(parsed_data)
             return parsed_data
         except Exception as e:
             logger.error(f"Error parsing vacancy: {str(e)}")
             return None
 
-    def get_all_vacancies(self, search_query: str = "python developer") -> List[Dict]:
+    def parse_page(self, items: List[Dict]) -> List[Dict]:
+        """
+        Parse a page of raw vacancies, dropping invalid ones
+
+        Also advances last_published_at to the newest vacancy on the page.
+        """
+        parsed_vacancies = []
+        for v in items:
+            published_at = v.get("published_at")
+            if published_at and (
+                self.last_published_at is None
+                or self.parse_published_at(published_at) > self.parse_published_at(self.last_published_at)
+            ):
+                self.last_published_at = published_at
+            parsed = self.parse_vacancy(v)
+            if parsed:
+                parsed_vacancies.append(parsed)
+        return parsed_vacancies
+
+    def get_all_vacancies(self,
+                          search_query: str = "python developer",
+                          concurrent: bool = False,
+                          area: int = 1,
+                          date_from: Optional[str] = None) -> List[Dict]:
         """
         Fetch all pages of vacancies
+
+        With concurrent=True pages are downloaded in parallel through
+        get_all_vacancies_async (only usable outside of a running event loop).
+        When date_from is set only vacancies published since then are fetched.
         """
+        if concurrent:
+            return asyncio.run(self.get_all_vacancies_async(search_query, area, date_from))
+
         all_vacancies = []
         page = 0
         
         while True:
-            vacancies = self.get_vacancies(text=search_query, page=page)
+            vacancies = self.get_vacancies(text=search_query, area=area, page=page, date_from=date_from)
             if not vacancies:
                 break
                 
-            parsed_vacancies = []
-            for v in vacancies:
-                parsed = self.parse_vacancy(v)
-                if parsed:
-                    parsed_vacancies.append(parsed)
-            
-            all_vacancies.extend(parsed_vacancies)
+            all_vacancies.extend(self.parse_page(vacancies))
             
             page += 1
-            if page >= 20:  # HH.ru limits to 2000 vacancies (20 pages * 100 items)
+            if page >= self.MAX_PAGES:
                 break
                 
         logger.info(f"Total vacancies parsed: {len(all_vacancies)}")
         return all_vacancies
 
+    def iter_pages(self,
+                   search_query: str = "python developer",
+                   area: int = 1,
+                   date_from: Optional[str] = None,
+                   prefetch: int = 2) -> Iterator[List[Dict]]:
+        """
+        Yield parsed vacancies page by page
+
+        A background thread downloads up to `prefetch` pages ahead, so the
+        caller can store one page while the next one is being fetched and
+        only a few pages are held in memory at a time.
+        """
+        pages: queue.Queue = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for page in range(self.MAX_PAGES):
+                    items = self.get_vacancies(text=search_query, area=area, page=page, date_from=date_from)
+                    if not items or not put(items):
+                        break
+            finally:
+                put(None)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                items = pages.get()
+                if items is None:
+                    break
+                yield self.parse_page(items)
+        finally:
+            stop.set()
+
+    def _create_async_session(self) -> aiohttp.ClientSession:
+        """
+        Create a pooled aiohttp session sized to the concurrency limit
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        return aiohttp.ClientSession(headers=self.headers,
+                                     connector=connector,
+                                     timeout=timeout)
+
+    def get_all_vacancies_sharded(self,
+                                  search_query: str = "python developer",
+                                  areas: Optional[List[int]] = None,
+                                  days: int = 30,
+                                  date_from: Optional[str] = None) -> List[Dict]:
+        """
+        Blocking wrapper around get_all_vacancies_sharded_async
+        """
+        return asyncio.run(self.get_all_vacancies_sharded_async(search_query, areas, days, date_from))
+
+    async def _fetch_page_async(self,
+                                session: aiohttp.ClientSession,
+                                semaphore: asyncio.Semaphore,
+                                params: Dict) -> Dict:
+        """
+        Fetch a single search page, returns the raw response body or {} on error
+
+        Retries follow the same rules as _fetch_page.
+        """
+        try:
+            key, cached, validators = self._cache_lookup(params)
+        except OfflineCacheMiss as e:
+            logger.warning(str(e))
+            return self._failed_page()
+        if cached is not None:
+            logger.info(f"Using cached vacancies from HH.ru (page {params['page']})")
+            return cached
+
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self.rate_limiter.slot_async():
+                        logger.info(f"Fetching vacancies from HH.ru (page {params['page']})")
+                        started = time.perf_counter()
+                        async with session.get(self.BASE_URL, params=params, headers=validators) as response:
+                            if response.status in self.THROTTLE_STATUSES:
+                                self.rate_limiter.on_throttled(parse_retry_after(response.headers.get("Retry-After")))
+                                logger.warning(f"HH.ru throttled page {params['page']} ({response.status})")
+                            elif response.status >= 500:
+                                logger.warning(f"HH.ru failed on page {params['page']} ({response.status})")
+                            else:
+                                response.raise_for_status()
+                                self.rate_limiter.on_success()
+                                if response.status == 304:
+                                    data = self.cache.revalidated(key)
+                                else:
+                                    data = await response.json()
+                                    if self.cache:
+                                        self.cache.store(key, data, response.headers)
+                                self.page_timings.append(time.perf_counter() - started)
+                                logger.info(f"Successfully fetched {len(data.get('items', []))} vacancies")
+                                return data
+                except aiohttp.ClientResponseError as e:
+                    logger.error(f"Error fetching vacancies: {str(e)}")
+                    return self._failed_page()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Error fetching vacancies: {str(e)}")
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.rate_limiter.backoff(attempt))
+
+        logger.error(f"Giving up on page {params['page']} after {self.max_retries} retries")
+        return self._failed_page()
+
+    async def _fetch_query_async(self,
+                                 session: aiohttp.ClientSession,
+                                 semaphore: asyncio.Semaphore,
+                                 params: Dict,
+                                 first_page: Optional[Dict] = None) -> List[Dict]:
+        """
+        Fetch every page of one query and return raw items in page order
+
+        The first page tells how many pages exist, the rest are fetched in
+        parallel. An already fetched first page can be passed in to avoid
+        requesting it twice.
+        """
+        if first_page is None:
+            first_page = await self._fetch_page_async(session, semaphore, {**params, "page": 0})
+        if not first_page.get("items"):
+            return []
+
+        pages = min(first_page.get("pages", 1), self.MAX_PAGES)
+        # gather keeps the order of the awaitables, so pages stay ordered
+        other_pages = await asyncio.gather(*(
+            self._fetch_page_async(session, semaphore, {**params, "page": page})
+            for page in range(1, pages)
+        ))
+
+        items = list(first_page["items"])
+        for data in other_pages:
+            items.extend(data.get("items", []))
+        return items
+
+    async def aiter_pages(self,
+                          search_query: str = "python developer",
+                          area: int = 1,
+                          date_from: Optional[str] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Asynchronously yield parsed vacancies page by page, in page order
+
+        At most `concurrency` pages are downloaded ahead of the consumer, so
+        pages can be stored while the following ones are still in flight.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        params = self._build_params(search_query, area, date_from=date_from)
+        async with self._create_async_session() as session:
+            first_page = await self._fetch_page_async(session, semaphore, {**params, "page": 0})
+            self._check_result_cap(first_page, params)
+            if not first_page.get("items"):
+                return
+
+            pages = min(first_page.get("pages", 1), self.MAX_PAGES)
+            pending = deque()
+            next_page = 1
+
+            def schedule():
+                nonlocal next_page
+                while next_page < pages and len(pending) < self.concurrency:
+                    pending.append(asyncio.ensure_future(
+                        self._fetch_page_async(session, semaphore, {**params, "page": next_page})
+                    ))
+                    next_page += 1
+
+            schedule()
+            try:
+                yield self.parse_page(first_page["items"])
+                while pending:
+                    data = await pending.popleft()
+                    schedule()
+                    yield self.parse_page(data.get("items", []))
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    async def get_all_vacancies_async(self,
+                                      search_query: str = "python developer",
+                                      area: int = 1,
+                                      date_from: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch all pages of vacancies concurrently
+
+        Pages are fetched over one pooled aiohttp session with at most
+        `concurrency` requests in flight. Results are returned in page order.
+        """
+        all_vacancies = []
+        async for page in self.aiter_pages(search_query, area, date_from):
+            all_vacancies.extend(page)
+
+        logger.info(f"Total vacancies parsed: {len(all_vacancies)}")
+        return all_vacancies
+
+    async def _crawl_shard_async(self,
+                                 session: aiohttp.ClientSession,
+                                 semaphore: asyncio.Semaphore,
+                                 params: Dict,
+                                 date_from: datetime,
+                                 date_to: datetime) -> List[Dict]:
+        """
+        Crawl one shard, splitting it further while it is over the result cap
+
+        A shard is first bisected by publication window. Once the window
+        reaches MIN_SHARD_WINDOW it is split by the experience facet, which
+        partitions vacancies without overlap.
+        """
+        shard_params = {
+            **params,
+            "date_from": date_from.isoformat(timespec="seconds"),
+            "date_to": date_to.isoformat(timespec="seconds"),
+        }
+        first_page = await self._fetch_page_async(session, semaphore, {**shard_params, "page": 0})
+        found = first_page.get("found", 0)
+
+        if found > self.RESULT_CAP:
+            if date_to - date_from > self.MIN_SHARD_WINDOW:
+                middle = date_from + (date_to - date_from) / 2
+                halves = await asyncio.gather(
+                    self._crawl_shard_async(session, semaphore, params, date_from, middle),
+                    self._crawl_shard_async(session, semaphore, params, middle, date_to),
+                )
+                return halves[0] + halves[1]
+            if "experience" not in params:
+                parts = await asyncio.gather(*(
+                    self._crawl_shard_async(session, semaphore, {**params, "experience": experience},
+                                            date_from, date_to)
+                    for experience in self.EXPERIENCE_LEVELS
+                ))
+                return [item for part in parts for item in part]
+            self._check_result_cap(first_page, shard_params)
+
+        return await self._fetch_query_async(session, semaphore, shard_params, first_page)
+
+    async def get_all_vacancies_sharded_async(self,
+                                              search_query: str = "python developer",
+                                              areas: Optional[List[int]] = None,
+                                              days: int = 30,
+                                              date_from: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch every vacancy of a search, working around the 2000 results cap
+
+        The search is split into one shard per area, and each shard is split
+        recursively (see _crawl_shard_async) until it fits under the cap.
+        All shards run in parallel and share the concurrency limit. Results
+        are deduplicated by vacancy URL. When date_from is set it replaces the
+        `days` window, so sharding also works for incremental crawls.
+        """
+        areas = areas or [1]
+        date_to = datetime.now().astimezone().replace(microsecond=0) + timedelta(seconds=1)
+        window_start = self.parse_published_at(date_from) if date_from else date_to - timedelta(days=days)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._create_async_session() as session:
+            shards = await asyncio.gather(*(
+                self._crawl_shard_async(session, semaphore,
+                                        self._build_params(search_query, area),
+                                        window_start, date_to)
+                for area in areas
+            ))
+
+        all_vacancies = []
+        seen_urls = set()
+        for items in shards:
+            for parsed in self.parse_page(items):
+                if parsed["url"] in seen_urls:
+                    continue
+                seen_urls.add(parsed["url"])
+                all_vacancies.append(parsed)
+
+        logger.info(f"Total vacancies parsed: {len(all_vacancies)} from {len(areas)} area(s)")
+        return all_vacancies
+
 if __name__ == "__main__":
     # Test the parser
     parser = HHParser()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineCacheMiss(Exception):
+    """Raised in offline mode when a request has no cached response"""
+
+
+class ResponseCache:
+    """
+    On-disk cache of JSON API responses keyed by normalized request parameters
+
+    Entries younger than `ttl` seconds are served without a request. Older
+    entries are revalidated with If-None-Match / If-Modified-Since when the
+    server sent ETag / Last-Modified. Least recently used entries are evicted
+    once the cache grows over `max_bytes`. In offline mode every cached
+    response is replayed regardless of age and a miss raises OfflineCacheMiss,
+    so benchmarks can run deterministically without network access.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 ttl: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 offline: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or os.getenv("HH_CACHE_DIR", ".cache/hh"))
+        self.ttl = ttl if ttl is not None else int(os.getenv("HH_CACHE_TTL", "300"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("HH_CACHE_MAX_MB", "100")) * 1024 * 1024
+        self.offline = offline if offline is not None else os.getenv("HH_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Cache configured from HH_CACHE_* variables, None when disabled by HH_CACHE_TTL=0"""
+        cache = cls()
+        if cache.ttl <= 0 and not cache.offline:
+            return None
+        return cache
+
+    @staticmethod
+    def make_key(url: str, params: Dict) -> str:
+        """Stable key for a request, independent of parameter order and value types"""
+        normalized = sorted((str(k), str(v).lower() if isinstance(v, bool) else str(v)) for k, v in params.items())
+        raw = json.dumps([url, normalized], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # mtime doubles as the last access time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def lookup(self, url: str, params: Dict) -> Tuple[str, Optional[Dict], Dict[str, str]]:
+        """
+        Look a request up in the cache
+
+        Returns the cache key, the cached body if it can be used as is (else
+        None) and the conditional headers to send when it has to be fetched.
+        """
+        key = self.make_key(url, params)
+        entry = self._read(key)
+
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"No cached response for {url} {params}")
+            return key, entry["body"], {}
+
+        if entry is None:
+            return key, None, {}
+        if time.time() - entry["fetched_at"] < self.ttl:
+            return key, entry["body"], {}
+
+        validators = {}
+        if entry.get("etag"):
+            validators["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            validators["If-Modified-Since"] = entry["last_modified"]
+        return key, None, validators
+
+    def revalidated(self, key: str) -> Dict:
+        """Mark an entry fresh again after a 304 response and return its body"""
+        entry = self._read(key)
+        if entry is None:
+            return {}
+        self._write(key, entry["body"], entry.get("etag"), entry.get("last_modified"))
+        return entry["body"]
+
+    def store(self, key: str, body: Dict, headers) -> None:
+        """Store a fresh response body with its validators"""
+        self._write(key, body, headers.get("ETag"), headers.get("Last-Modified"))
+
+    def _write(self, key: str, body: Dict, etag: Optional[str], last_modified: Optional[str]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        old_size = path.stat().st_size if path.exists() else 0
+
+        # Write to a temporary file first so readers never see partial entries
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json"))
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is at 90% of its budget"""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+            removed += 1
+        self._size = size
+        logger.info(f"Evicted {removed} cached responses, cache size is now {size} bytes")
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+import logging
+from contextlib import contextmanager, asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header (delay or HTTP date)
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket for the outbound requests to one host
+
+    Requests take a token each; tokens refill at `rate` per second up to
+    `burst`. The rate is halved on every throttling response (429/503) and
+    grows back by `increase` per successful request (AIMD), up to
+    `max_rate`, by default the initial rate. A Retry-After pauses every
+    caller until it expires. At most
+    `max_concurrency` requests are in flight at once, counted separately
+    for threads and for each event loop.
+    """
+
+    def __init__(self,
+                 rate: float = 5.0,
+                 burst: int = 5,
+                 min_rate: float = 0.5,
+                 max_rate: Optional[float] = None,
+                 increase: float = 0.1,
+                 max_concurrency: int = 8,
+                 backoff_base: float = 0.5,
+                 backoff_cap: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._thread_slots = threading.BoundedSemaphore(max_concurrency)
+        self._loop_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller has to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"Throttled by server, rate lowered to {self.rate:.2f} req/s"
+                       + (f", pausing {retry_after:.1f}s" if retry_after else ""))
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered exponential delay before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @contextmanager
+    def slot(self):
+        """Wait for a token and a free concurrency slot (blocking)"""
+        with self._thread_slots:
+            time.sleep(self._reserve())
+            yield
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Wait for a token and a free concurrency slot of the running loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._loop_slots.get(loop)
+        if semaphore is None:
+            semaphore = self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            await asyncio.sleep(self._reserve())
+            yield
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(url: str) -> AdaptiveRateLimiter:
+    """
+    Limiter shared by every request to the host of `url`
+
+    Configured with API_RATE_LIMIT (requests per second, never exceeded) and
+    API_MAX_CONCURRENCY (requests in flight per host).
+    """
+    host = urlparse(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveRateLimiter(
+                rate=float(os.getenv("API_RATE_LIMIT", "5")),
+                max_concurrency=int(os.getenv("API_MAX_CONCURRENCY", "8")),
+            )
+        return limiter
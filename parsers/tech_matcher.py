@@ -0,0 +1,67 @@
+import re
+from typing import List
+
+# Common tech stack keywords (canonical names)
+TECH_KEYWORDS = [
+    # Languages
+    "python", "java", "javascript", "typescript", "go", "rust", "c++", "c#", "php",
+
+    # Frontend
+    "react", "vue", "angular", "html", "css", "sass", "less", "tailwind", "bootstrap",
+
+    # Backend
+    "django", "flask", "fastapi", "spring", "node.js", "express", "laravel",
+
+    # Databases
+    "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "sqlite",
+
+    # Cloud & DevOps
+    "docker", "kubernetes", "aws", "azure", "gcp", "git",
+
+    # AI/ML
+    "tensorflow", "pytorch", "pandas", "numpy", "opencv", "keras",
+
+    # Testing
+    "pytest", "selenium", "cypress", "postman"
+]
+
+# Alternative spellings mapped to their canonical keyword
+TECH_ALIASES = {
+    "golang": "go",
+    "postgres": "postgresql",
+    "nodejs": "node.js",
+    "k8s": "kubernetes",
+    "reactjs": "react",
+    "react.js": "react",
+    "vue.js": "vue",
+    "vuejs": "vue",
+}
+
+_CANONICAL = {keyword: keyword for keyword in TECH_KEYWORDS}
+_CANONICAL.update(TECH_ALIASES)
+_TERMS = frozenset(_CANONICAL)
+
+# Tokens are runs of word characters plus "+" and "#", optionally joined by
+# inner dots ("node.js", "c++", "c#"). Matching whole tokens instead of
+# substrings means "go" does not match "google" and "git" does not match
+# "github"; a trailing sentence dot is not part of the token. A trailing
+# version ("python3", "c++17", "postgresql14", "python3.11") is matched
+# but left out of the captured name, which never ends in a digit.
+TOKEN_PATTERN = re.compile(r"((?:[\w+#]+\.)*?[\w+#]*(?:[^\W\d]|[+#]))(?:\d+(?:\.\d+)*)?(?![\w+#]|\.[\w+#])")
+
+
+def extract_tech_stack(text: str) -> List[str]:
+    """
+    Return canonical technologies mentioned in text, in order of first mention
+    """
+    if not text:
+        return []
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    hits = _TERMS.intersection(tokens)
+    if not hits:
+        return []
+    found = {}
+    for token in tokens:
+        if token in hits:
+            found.setdefault(_CANONICAL[token], None)
+    return list(found)
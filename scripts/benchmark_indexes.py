@@ -0,0 +1,156 @@
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.models import Base, Vacancy
+from storage.migrations import run_migrations
+
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Нижний Новгород",
+          "Краснодар", "Самара", "Ростов-на-Дону", "Минск", "Алматы", "Удаленно", None]
+TECHS = ["python", "django", "fastapi", "flask", "postgresql", "redis", "docker", "kubernetes",
+         "react", "typescript", "go", "aws", "git", "pandas", "celery"]
+DAYS = 90
+INDEXES = ["ix_vacancies_created_at", "ix_vacancies_updated_at", "ix_vacancies_city"]
+
+
+def populate(engine: Engine, rows: int, chunk: int = 50000) -> None:
+    """
+    `rows` synthetic vacancies created over the last DAYS days
+
+    Rows are inserted in creation order, like a crawled table grows, so
+    ids and created_at are correlated as they are in production.
+    """
+    rng = random.Random(1)
+    now = datetime.now()
+    step = DAYS * 86400 / rows
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(rows, start + chunk)):
+                created_at = now - timedelta(seconds=(rows - i) * step)
+                salary_from = rng.choice([None, rng.randrange(50000, 400000, 5000)])
+                batch.append({
+                    "title": "Python developer",
+                    "company": f"Company {rng.randint(1, 20000)}",
+                    "city": rng.choice(CITIES),
+                    "tech_stack": ",".join(rng.sample(TECHS, rng.randint(1, 5))),
+                    "salary_from": salary_from,
+                    "salary_to": salary_from * 1.5 if salary_from else None,
+                    "currency": "RUR",
+                    "url": f"https://hh.ru/vacancy/{i}",
+                    "source": "hh.ru",
+                    "created_at": created_at,
+                    "updated_at": created_at + timedelta(seconds=rng.randint(0, 86400)),
+                })
+            conn.execute(Vacancy.__table__.insert(), batch)
+            print(f"\rInserted {min(rows, start + chunk)}/{rows} rows", end="", flush=True)
+    print()
+
+
+def access_paths(now: datetime) -> List[Tuple[str, Callable]]:
+    """The queries the application runs against vacancies, as (name, statement factory)"""
+    week_ago = now - timedelta(days=7)
+    return [
+        ("export: created_at >= now-3d",
+         lambda: select(Vacancy).where(Vacancy.created_at >= now - timedelta(days=3))),
+        ("analyzer: previous week",
+         lambda: select(Vacancy).where(Vacancy.created_at >= now - timedelta(days=14),
+                                       Vacancy.created_at < week_ago)),
+        ("stats: GROUP BY city",
+         lambda: select(Vacancy.city, func.count(Vacancy.id)).group_by(Vacancy.city)),
+        ("bot: latest created_at",
+         lambda: select(Vacancy).order_by(Vacancy.created_at.desc()).limit(1)),
+        # A daily cleanup run removes about one day of vacancies
+        ("cleanup: oldest day",
+         lambda: delete(Vacancy).where(Vacancy.updated_at < now - timedelta(days=DAYS - 1))),
+    ]
+
+
+def query_plan(conn: Connection, stmt) -> str:
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return "; ".join(row[-1] for row in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+    return "; ".join(row[0].strip() for row in rows)
+
+
+def measure(engine: Engine, repeat: int) -> Dict[str, Tuple[float, str]]:
+    """Best time in ms and the plan of every access path; deletes are rolled back"""
+    results = {}
+    for name, make_stmt in access_paths(datetime.now()):
+        best = float("inf")
+        for _ in range(repeat):
+            with engine.connect() as conn:
+                stmt = make_stmt()
+                started = time.perf_counter()
+                result = conn.execute(stmt)
+                if result.returns_rows:
+                    result.all()
+                best = min(best, time.perf_counter() - started)
+                conn.rollback()
+        with engine.connect() as conn:
+            plan = query_plan(conn, make_stmt())
+        results[name] = (best * 1000, plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plans and timings of the vacancies access paths with and without indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", default=None,
+                        help="empty database to run on (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_indexes_')}/bench.db"
+    engine = create_engine(database_url)
+    print(f"Database: {database_url}")
+
+    # Start from the schema of a database created before the migrations
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    populate(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    before = measure(engine, args.repeat)
+
+    started = time.perf_counter()
+    version = run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"Migrated to schema version {version} in {time.perf_counter() - started:.1f}s")
+    after = measure(engine, args.repeat)
+
+    print()
+    print(f"{'access path':<32} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (before_ms, _) in before.items():
+        after_ms = after[name][0]
+        print(f"{name:<32} {before_ms:10.1f} {after_ms:10.1f} {before_ms / after_ms:7.1f}x")
+
+    print()
+    for name in before:
+        print(name)
+        print(f"  before: {before[name][1]}")
+        print(f"  after:  {after[name][1]}")
+
+
+if __name__ == "__main__":
+    main()
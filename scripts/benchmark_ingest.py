@@ -0,0 +1,173 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import logging
+import tempfile
+from typing import List, Dict, Optional
+
+# The benchmark works on its own database and never talks to the real API,
+# so the environment has to be set before storage and parsers are imported
+_tmp_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/bench.db"
+os.environ["HH_CACHE_TTL"] = "0"
+os.environ.setdefault("API_RATE_LIMIT", "1000")
+os.environ.setdefault("API_MAX_CONCURRENCY", "16")
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.fake_hh_server import build_vacancies, create_app, run_in_thread
+from parsers.hh_parser import HHParser
+from storage.database import get_db, init_db, engine
+from storage.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def reset_db() -> None:
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+
+
+def report(name: str, count: int, elapsed: float, timings: Optional[List[float]] = None, unit: str = "vacancies") -> Dict:
+    result = {
+        "name": name,
+        "count": count,
+        "seconds": round(elapsed, 3),
+        "per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+    line = f"{name:<28} {count:>7} {unit:<9} {elapsed:8.2f}s {result['per_sec']:>10.1f}/s"
+    if timings:
+        result["p50_ms"] = round(percentile(timings, 50) * 1000, 1)
+        result["p99_ms"] = round(percentile(timings, 99) * 1000, 1)
+        line += f"   page p50 {result['p50_ms']:7.1f}ms  p99 {result['p99_ms']:7.1f}ms"
+    print(line)
+    return result
+
+
+def bench_parser_serial(search_query: str) -> Dict:
+    parser = HHParser()
+    started = time.perf_counter()
+    vacancies = parser.get_all_vacancies(search_query)
+    return report("HHParser serial", len(vacancies), time.perf_counter() - started, list(parser.page_timings))
+
+
+def bench_parser_async(search_query: str) -> Dict:
+    parser = HHParser()
+    started = time.perf_counter()
+    vacancies = asyncio.run(parser.get_all_vacancies_async(search_query))
+    return report("HHParser async", len(vacancies), time.perf_counter() - started, list(parser.page_timings))
+
+
+def bench_parser_sharded(search_query: str, days: int) -> Dict:
+    parser = HHParser()
+    started = time.perf_counter()
+    vacancies = parser.get_all_vacancies_sharded(search_query, areas=[1], days=days)
+    return report("HHParser sharded", len(vacancies), time.perf_counter() - started, list(parser.page_timings))
+
+
+def bench_collector(search_query: str) -> Dict:
+    from scripts.data_collector import DataCollector
+
+    reset_db()
+    collector = DataCollector(search_query=search_query)
+    started = time.perf_counter()
+    results = collector.collect_data(full_sync=True)
+    elapsed = time.perf_counter() - started
+    timings = [t for parser in collector.parsers.values() for t in getattr(parser, "page_timings", [])]
+    return report("DataCollector.collect_data", results["total_vacancies"], elapsed, timings)
+
+
+def bench_db_writes(vacancies: List[Dict]) -> Dict:
+    from scripts.data_collector import DataCollector
+
+    collector = DataCollector()
+    reset_db()
+    db = next(get_db())
+    try:
+        started = time.perf_counter()
+        saved = collector.save_vacancies(db, [dict(v) for v in vacancies])
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    return report("DB save_vacancies", saved, elapsed, unit="rows")
+
+
+def bench_refresh_endpoint() -> Optional[Dict]:
+    try:
+        from fastapi.testclient import TestClient
+        from backend.main import app
+    except ImportError as e:
+        # backend.main needs the bot configuration module and FastAPI test deps
+        print(f"{'POST /vacancies/refresh':<28} skipped ({e})")
+        return None
+
+    reset_db()
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        response = client.post("/vacancies/refresh", params={"full": "true"})
+        response.raise_for_status()
+        # The crawl runs as a background job, timed until it finishes
+        job = response.json()
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.05)
+            job = client.get(f"/jobs/{job['id']}").json()
+        elapsed = time.perf_counter() - started
+    if job["status"] != "succeeded":
+        raise RuntimeError(f"Refresh job failed: {job['error']}")
+    return report("POST /vacancies/refresh", job["result"]["total_processed"], elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End to end crawl and ingest benchmark against a local fake HH.ru")
+    parser.add_argument("--total", type=int, default=5000, help="vacancies served by the fake server")
+    parser.add_argument("--days", type=int, default=30, help="publication dates are spread over this many days")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--query", default="python developer")
+    args = parser.parse_args()
+
+    # Per-page progress logs of the parsers would drown the report
+    logging.disable(logging.INFO)
+
+    served = build_vacancies(args.total, days=args.days)
+    app = create_app(served, args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate)
+    base_url, stop = run_in_thread(app)
+    HHParser.BASE_URL = base_url
+
+    print(f"Fake HH.ru at {base_url}: {len(served)} vacancies, "
+          f"latency {args.latency_ms}±{args.jitter_ms}ms, "
+          f"errors {args.error_rate:.0%}, throttling {args.throttle_rate:.0%}")
+    print(f"Database: {os.environ['DATABASE_URL']}")
+    print()
+
+    try:
+        bench_parser_serial(args.query)
+        bench_parser_async(args.query)
+        bench_parser_sharded(args.query, args.days)
+        bench_collector(args.query)
+        parsed = HHParser().parse_page(served)
+        bench_db_writes(parsed)
+        bench_refresh_endpoint()
+    finally:
+        stop.set()
+
+    stats = app["stats"]
+    print()
+    print(f"Server handled {stats['requests']} requests "
+          f"({stats['errors']} errors, {stats['throttled']} throttled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+import logging
+import tempfile
+from typing import Dict, List
+
+# The benchmark works on its own database, so the environment has to be
+# set before storage and the API are imported
+_tmp_dir = tempfile.mkdtemp(prefix="bench_serialization_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/bench.db"
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Depends, Query
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.main import VacancyResponse, app
+from storage.database import SessionLocal, dispose_async_engine, get_async_db, init_db
+from storage.ingest import upsert_vacancies
+from storage.models import Vacancy
+
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Удаленно"]
+TECHS = ["python", "django", "fastapi", "postgresql", "redis", "docker", "kubernetes", "react", "go"]
+
+
+def make_vacancy(i: int, rng: random.Random) -> Dict:
+    return {
+        "title": f"Python developer {rng.randint(1, 1000)}",
+        "company": f"Company {rng.randint(1, 5000)}",
+        "city": rng.choice(CITIES),
+        "tech_stack": ",".join(rng.sample(TECHS, rng.randint(1, 4))),
+        "salary_from": rng.randrange(50000, 400000, 5000),
+        "salary_to": None,
+        "currency": "RUR",
+        "url": f"https://hh.ru/vacancy/{i}",
+        "source": "hh.ru",
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def seed(rows: int) -> None:
+    init_db()
+    rng = random.Random(1)
+    with SessionLocal() as session:
+        for start in range(0, rows, 10000):
+            upsert_vacancies(session, [make_vacancy(i, rng) for i in range(start, min(rows, start + 10000))],
+                             batch_size=10000)
+
+
+# GET /vacancies/ before the column-only path: ORM objects, a dict built per
+# row, then validation of every dict against VacancyResponse
+@app.get("/benchmark/legacy-vacancies", response_model=List[VacancyResponse], include_in_schema=False)
+async def legacy_vacancies(limit: int = Query(100), db: AsyncSession = Depends(get_async_db)):
+    query = select(Vacancy).order_by(Vacancy.created_at.desc(), Vacancy.id.desc()).limit(limit)
+    vacancies = (await db.execute(query)).scalars().all()
+    return [
+        {
+            "id": v.id,
+            "title": v.title,
+            "company": v.company,
+            "city": v.city,
+            "tech_stack": v.tech_stack,
+            "salary_from": v.salary_from,
+            "salary_to": v.salary_to,
+            "currency": v.currency,
+            "url": v.url,
+            "source": v.source,
+            "created_at": v.created_at.isoformat() if v.created_at else None,
+            "updated_at": v.updated_at.isoformat() if v.updated_at else None
+        }
+        for v in vacancies
+    ]
+
+
+async def bench(client: AsyncClient, path: str, limit: int, seconds: float) -> Dict:
+    latencies: List[float] = []
+    size = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path, params={"limit": limit})
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        size = len(response.content)
+    return {
+        "responses_per_sec": len(latencies) / sum(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "bytes": size,
+    }
+
+
+async def run(limits: List[int], seconds: float) -> None:
+    paths = {"legacy": "/benchmark/legacy-vacancies", "columns+orjson": "/vacancies/"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+        # Both paths must return the same documents
+        for limit in limits:
+            legacy, fast = [(await client.get(path, params={"limit": limit})).json() for path in paths.values()]
+            if legacy != fast:
+                raise RuntimeError(f"Responses differ at limit={limit}")
+
+        print(f"{'path':<16} {'limit':>6} {'resp/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>9}")
+        for limit in limits:
+            for name, path in paths.items():
+                r = await bench(client, path, limit, seconds)
+                print(f"{name:<16} {limit:>6} {r['responses_per_sec']:>8.1f} {r['p50_ms']:>8.2f} "
+                      f"{r['p99_ms']:>8.2f} {r['bytes']:>9}")
+    await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /vacancies/ serialization: ORM + Pydantic vs column tuples + orjson")
+    parser.add_argument("--rows", type=int, default=20000, help="vacancies seeded before the run")
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 5000])
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each measurement")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"Database: {os.environ['DATABASE_URL']}, {args.rows} vacancies")
+    seed(args.rows)
+    asyncio.run(run(args.limits, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
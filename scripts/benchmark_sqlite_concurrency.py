@@ -0,0 +1,154 @@
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.database import create_db_engine
+from storage.ingest import upsert_vacancies
+from storage.models import Base, Vacancy
+
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Удаленно"]
+TECHS = ["python", "django", "fastapi", "postgresql", "redis", "docker", "kubernetes", "react", "go"]
+
+
+def make_vacancy(i: int, rng: random.Random) -> Dict:
+    return {
+        "title": f"Python developer {rng.randint(1, 1000)}",
+        "company": f"Company {rng.randint(1, 5000)}",
+        "city": rng.choice(CITIES),
+        "tech_stack": ",".join(rng.sample(TECHS, rng.randint(1, 4))),
+        "salary_from": rng.randrange(50000, 400000, 5000),
+        "salary_to": None,
+        "currency": "RUR",
+        "url": f"https://hh.ru/vacancy/{i}",
+        "source": "hh.ru",
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(engine: Engine, rows: int, seconds: float, readers: int, write_batch: int, writer: bool) -> Dict:
+    """Readers run the stats queries while one writer upserts large batches"""
+    Session = sessionmaker(bind=engine)
+    stop = threading.Event()
+    latencies: List[float] = []
+    reader_errors = [0]
+    written = [0]
+    writer_errors = [0]
+    lock = threading.Lock()
+
+    def read_loop():
+        session = Session()
+        week_ago = datetime.now() - timedelta(days=7)
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    session.execute(select(Vacancy.city, func.count(Vacancy.id)).group_by(Vacancy.city)).all()
+                    session.execute(select(Vacancy).order_by(Vacancy.created_at.desc()).limit(1)).all()
+                    session.execute(select(func.count(Vacancy.id)).where(Vacancy.created_at >= week_ago)).scalar()
+                    session.rollback()
+                except OperationalError:
+                    session.rollback()
+                    with lock:
+                        reader_errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            session.close()
+
+    def write_loop():
+        session = Session()
+        rng = random.Random(2)
+        try:
+            while not stop.is_set():
+                # Half new vacancies, half changed existing ones, in one transaction
+                batch = [make_vacancy(rng.randrange(rows * 2), rng) for _ in range(write_batch)]
+                try:
+                    upsert_vacancies(session, batch, batch_size=write_batch)
+                    written[0] += len(batch)
+                except OperationalError:
+                    session.rollback()
+                    writer_errors[0] += 1
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    if writer:
+        threads.append(threading.Thread(target=write_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "reads": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0) * 1000,
+        "read_errors": reader_errors[0],
+        "rows_per_sec": written[0] / seconds,
+        "write_errors": writer_errors[0],
+    }
+
+
+def seed(engine: Engine, rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(1)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        for start in range(0, rows, 10000):
+            upsert_vacancies(session, [make_vacancy(i, rng) for i in range(start, min(rows, start + 10000))],
+                             batch_size=10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reader latency while ingest writes, legacy vs tuned SQLite profile")
+    parser.add_argument("--rows", type=int, default=100000, help="vacancies seeded before the run")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--write-batch", type=int, default=5000, help="vacancies per write transaction")
+    args = parser.parse_args()
+
+    profiles = {
+        # storage/database.py before the profile: rollback journal, driver defaults
+        "legacy": lambda url: create_engine(url, connect_args={"check_same_thread": False}),
+        "tuned": lambda url: create_db_engine(url),
+    }
+
+    print(f"{'profile':<8} {'writer':<7} {'reads':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'read err':>8} {'rows/s':>8} {'write err':>9}")
+    for name, make_engine in profiles.items():
+        url = f"sqlite:///{tempfile.mkdtemp(prefix='bench_sqlite_')}/bench.db"
+        engine = make_engine(url)
+        seed(engine, args.rows)
+        for writer in (False, True):
+            r = run(engine, args.rows, args.seconds, args.readers, args.write_batch, writer)
+            print(f"{name:<8} {'on' if writer else 'off':<7} {r['reads']:>7} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                  f"{r['max_ms']:>8.1f} {r['read_errors']:>8} {r['rows_per_sec']:>8.0f} {r['write_errors']:>9}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
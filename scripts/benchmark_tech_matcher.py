@@ -0,0 +1,78 @@
+import sys
+import os
+import json
+import time
+from pathlib import Path
+from typing import List, Dict
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.tech_matcher import extract_tech_stack
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def legacy_extract(full_text: str) -> List[str]:
+    """Keyword loop used by HHParser.parse_vacancy before tech_matcher"""
+    tech_stack = []
+    tech_keywords = [
+        "python", "java", "javascript", "typescript", "go", "golang", "rust", "c++", "c#", "php",
+        "react", "vue", "angular", "html", "css", "sass", "less", "tailwind", "bootstrap",
+        "django", "flask", "fastapi", "spring", "node.js", "express", "laravel",
+        "postgresql", "mysql", "mongodb", "redis", "elasticsearch", "sqlite",
+        "docker", "kubernetes", "aws", "azure", "gcp", "git",
+        "tensorflow", "pytorch", "pandas", "numpy", "opencv", "keras",
+        "pytest", "selenium", "cypress", "postman"
+    ]
+    for tech in tech_keywords:
+        if tech in full_text:
+            tech_stack.append(tech)
+    return list(set(tech_stack))
+
+
+def load_corpus() -> List[str]:
+    """Texts built from the stored parseddata/*.json dumps"""
+    texts = []
+    for path in sorted(ROOT_DIR.glob("**/parseddata/vacancies_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            vacancies: List[Dict] = json.load(f)
+        for v in vacancies:
+            # The dumps keep only the parsed result, so the title and the
+            # detected technologies stand in for the snippet text
+            techs = (v.get("tech_stack") or "").replace(",", ", ")
+            texts.append(f"{v.get('title') or ''} {techs}".lower())
+    return texts
+
+
+def bench(func, texts: List[str], repeat: int) -> float:
+    """Best per-vacancy time in microseconds over `repeat` passes"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    texts = load_corpus()
+    if not texts:
+        print("No parseddata/vacancies_*.json files found")
+        return
+
+    legacy_us = bench(legacy_extract, texts, repeat)
+    matcher_us = bench(extract_tech_stack, texts, repeat)
+
+    differing = sum(1 for t in texts if set(legacy_extract(t)) != set(extract_tech_stack(t)))
+
+    print(f"Corpus: {len(texts)} vacancies, best of {repeat} runs")
+    print(f"Keyword loop:     {legacy_us:8.2f} us/vacancy")
+    print(f"Token matcher:    {matcher_us:8.2f} us/vacancy ({legacy_us / matcher_us:.1f}x)")
+    print(f"Vacancies tagged differently (aliases, false positives): {differing}")
+
+
+if __name__ == "__main__":
+    main()
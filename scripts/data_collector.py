@@ -4,9 +4,8 @@ import logging
 import time
 import json
 import csv
+import threading
 from datetime import datetime, timedelta
-import random
-import requests
 from pathlib import Path
 import pandas as pd
 from typing import List, Dict
@@ -16,7 +15,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from storage.database import get_db, init_db
 from storage.models import Vacancy
+from storage.watermarks import get_date_from, save_watermark
+from storage.ingest import upsert_vacancies
+from parsers.base import BaseParser, create_parsers
 from parsers.hh_parser import HHParser
+from parsers.hh_enricher import VacancyEnricher
 
 # Configure logging
 log_dir = Path("logs")
@@ -33,52 +36,106 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class DataCollector:
-    def __init__(self):
-        self.session = requests.Session()
-        self.parsers = {
-            'hh.ru': HHParser()
-        }
-        # Добавим случайные задержки между запросами для защиты от банов
-        self.min_delay = 2  # минимальная задержка в секундах
-        self.max_delay = 5  # максимальная задержка в секундах
-        
-    def random_delay(self):
-        """Случайная задержка между запросами"""
-        delay = random.uniform(self.min_delay, self.max_delay)
-        time.sleep(delay)
+    def __init__(self,
+                 search_query: str = "python developer",
+                 area: int = 1,
+                 enrich: bool = False,
+                 source_timeout: float = 3600):
+        self.search_query = search_query
+        self.area = area
+        # Дополнять технологии из полного описания вакансий (только hh.ru)
+        self.enricher = VacancyEnricher() if enrich else None
+        # Все зарегистрированные источники, у каждого своя HTTP-сессия
+        self.parsers = create_parsers()
+        # Максимальное время сбора одного источника в секундах
+        self.source_timeout = source_timeout
         
-    def collect_data(self) -> Dict:
-        """Сбор данных со всех источников"""
+    def save_vacancies(self, db, vacancies: List[Dict]) -> int:
+        """Сохранение новых вакансий в базу, возвращает количество добавленных"""
+        return upsert_vacancies(db, vacancies, update_existing=False)["new"]
+
+    def collect_source(self, source: str, parser: BaseParser, full_sync: bool = False) -> Dict:
+        """Сбор данных с одного источника, ошибки не выходят за его пределы"""
+        source_start_time = time.time()
+        db = next(get_db())
+        try:
+            date_from = get_date_from(db, self.search_query, self.area, full_sync, source=source)
+            logger.info(f"Starting collection from {source} (date_from={date_from})")
+            
+            # Страница сохраняется в базу, пока следующая загружается
+            count = 0
+            saved_count = 0
+            for vacancies in parser.iter_pages(self.search_query, area=self.area, date_from=date_from):
+                count += len(vacancies)
+                if self.enricher and source == HHParser.source:
+                    self.enricher.enrich(vacancies)
+                saved_count += self.save_vacancies(db, vacancies)
+            save_watermark(db, self.search_query, self.area, parser.last_published_at,
+                           full_sync=date_from is None, source=source, complete=parser.complete)
+            
+            source_time = time.time() - source_start_time
+            logger.info(f"Collected {count} vacancies from {source} in {round(source_time, 2)} seconds")
+            return {
+                'count': count,
+                'saved': saved_count,
+                'time_taken': round(source_time, 2)
+            }
+        except Exception as e:
+            logger.error(f"Error collecting data from {source}: {str(e)}")
+            db.rollback()
+            return {
+                'error': str(e),
+                'count': 0,
+                'time_taken': round(time.time() - source_start_time, 2)
+            }
+        finally:
+            db.close()
+
+    def collect_data(self, full_sync: bool = False) -> Dict:
+        """Сбор данных со всех источников
+
+        Источники собираются параллельно, каждый в своем потоке, так что
+        медленный или сломанный источник не задерживает остальные. Источник,
+        не уложившийся в source_timeout, бросается: его поток — демон и не
+        держит процесс при выходе (незавершенная транзакция откатывается).
+        По умолчанию загружаются только вакансии, опубликованные после
+        отметки прошлого сбора. full_sync=True загружает всё заново.
+        """
         start_time = time.time()
         results = {
             'total_vacancies': 0,
             'sources': {}
         }
+        if not self.parsers:
+            logger.warning("No parsers registered")
+            return results
         
-        for source, parser in self.parsers.items():
-            try:
-                source_start_time = time.time()
-                logger.info(f"Starting collection from {source}")
-                
-                vacancies = parser.get_all_vacancies()
-                
-                source_time = time.time() - source_start_time
-                results['sources'][source] = {
-                    'count': len(vacancies),
-                    'time_taken': round(source_time, 2)
-                }
-                results['total_vacancies'] += len(vacancies)
-                
-                logger.info(f"Collected {len(vacancies)} vacancies from {source} in {round(source_time, 2)} seconds")
-                self.random_delay()
-                
-            except Exception as e:
-                logger.error(f"Error collecting data from {source}: {str(e)}")
-                results['sources'][source] = {
-                    'error': str(e),
+        collected = {}
+
+        def run(source: str, parser: BaseParser):
+            collected[source] = self.collect_source(source, parser, full_sync)
+
+        threads = [
+            threading.Thread(target=run, args=(source, parser), name=f"collector-{source}", daemon=True)
+            for source, parser in self.parsers.items()
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + self.source_timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        
+        for source in self.parsers:
+            result = collected.get(source)
+            if result is None:
+                logger.error(f"Collection from {source} did not finish in {self.source_timeout} seconds")
+                result = {
+                    'error': 'timeout',
                     'count': 0,
-                    'time_taken': 0
+                    'time_taken': self.source_timeout
                 }
+            results['sources'][source] = result
+            results['total_vacancies'] += result['count']
         
         total_time = time.time() - start_time
         results['total_time'] = round(total_time, 2)
@@ -144,11 +201,11 @@ def main():
         # Инициализируем базу данных
         init_db()
         
-        collector = DataCollector()
+        collector = DataCollector(enrich="--enrich" in sys.argv)
         
         # Собираем новые данные
         logger.info("Starting data collection")
-        results = collector.collect_data()
+        results = collector.collect_data(full_sync="--full" in sys.argv)
         logger.info(f"Collection results: {json.dumps(results, indent=2)}")
         
         # Экспортируем данные за последние 3 дня
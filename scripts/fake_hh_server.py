@@ -0,0 +1,214 @@
+import sys
+import os
+import json
+import asyncio
+import random
+import argparse
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from aiohttp import web
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RESULT_CAP = 2000  # HH.ru never pages past the first 2000 results
+MOSCOW_TZ = timezone(timedelta(hours=3))
+
+
+def load_seed_vacancies() -> List[Dict]:
+    """Уникальные вакансии из сохраненных parseddata/*.json"""
+    seen = {}
+    for path in sorted(ROOT_DIR.glob("**/parseddata/vacancies_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            for v in json.load(f):
+                seen.setdefault(v["url"], v)
+    return list(seen.values())
+
+
+def to_raw_vacancy(seed: Dict, vacancy_id: int, published_at: datetime) -> Dict:
+    """Вакансия в формате ответа HH.ru /vacancies"""
+    techs = (seed.get("tech_stack") or "").replace(",", ", ")
+    return {
+        "id": str(vacancy_id),
+        "name": seed.get("title"),
+        "employer": {"name": seed.get("company")},
+        "area": {"id": "1", "name": seed.get("city")},
+        "salary": {
+            "from": seed.get("salary_from"),
+            "to": seed.get("salary_to"),
+            "currency": seed.get("currency"),
+        },
+        "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+        "published_at": published_at.astimezone(MOSCOW_TZ).strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "snippet": {
+            "requirement": f"Опыт работы с {techs}" if techs else "",
+            "responsibility": "",
+        },
+    }
+
+
+def build_vacancies(total: Optional[int] = None, days: int = 30, seed: int = 42) -> List[Dict]:
+    """
+    Набор вакансий для сервера, newest first
+
+    Вакансии из parseddata повторяются по кругу с новыми id, пока их не
+    станет `total`; даты публикации равномерно распределены за `days` дней.
+    """
+    seeds = load_seed_vacancies()
+    if not seeds:
+        raise RuntimeError("No parseddata/vacancies_*.json files to seed the server from")
+    total = total or len(seeds)
+    rng = random.Random(seed)
+    now = datetime.now(MOSCOW_TZ).replace(microsecond=0)
+    step = timedelta(days=days) / total
+    return [
+        to_raw_vacancy(seeds[i % len(seeds)], 100000000 + i, now - step * i - timedelta(seconds=rng.randint(0, 59)))
+        for i in range(total)
+    ]
+
+
+def create_app(vacancies: List[Dict],
+               latency_ms: float = 0,
+               jitter_ms: float = 0,
+               error_rate: float = 0,
+               throttle_rate: float = 0) -> web.Application:
+    """
+    aiohttp-приложение, отвечающее как /vacancies и /vacancies/{id} HH.ru
+
+    - latency_ms / jitter_ms: задержка каждого ответа
+    - error_rate: доля ответов 500
+    - throttle_rate: доля ответов 429 с Retry-After
+    """
+    by_id = {v["id"]: v for v in vacancies}
+    published = [_published(v) for v in vacancies]
+    stats = {"requests": 0, "errors": 0, "throttled": 0}
+
+    async def delay_or_fail() -> Optional[web.Response]:
+        stats["requests"] += 1
+        if latency_ms or jitter_ms:
+            await asyncio.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+        roll = random.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return web.json_response({"errors": [{"type": "too_many_requests"}]}, status=429,
+                                     headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return web.json_response({"errors": [{"type": "server_error"}]}, status=500)
+        return None
+
+    async def search(request: web.Request) -> web.Response:
+        failure = await delay_or_fail()
+        if failure:
+            return failure
+
+        query = request.query
+        date_from = _parse_date(query.get("date_from"))
+        date_to = _parse_date(query.get("date_to"))
+        items = [
+            v for v, published_at in zip(vacancies, published)
+            if (date_from is None or published_at >= date_from)
+            and (date_to is None or published_at <= date_to)
+        ]
+
+        per_page = int(query.get("per_page", 20))
+        page = int(query.get("page", 0))
+        reachable = items[:RESULT_CAP]
+        return web.json_response({
+            "items": reachable[page * per_page:(page + 1) * per_page],
+            "found": len(items),
+            "pages": (len(reachable) + per_page - 1) // per_page,
+            "page": page,
+            "per_page": per_page,
+        })
+
+    async def details(request: web.Request) -> web.Response:
+        failure = await delay_or_fail()
+        if failure:
+            return failure
+        vacancy = by_id.get(request.match_info["vacancy_id"])
+        if not vacancy:
+            return web.json_response({"errors": [{"type": "not_found"}]}, status=404)
+        techs = [t.strip() for t in vacancy["snippet"]["requirement"].replace("Опыт работы с", "").split(",") if t.strip()]
+        return web.json_response({
+            **vacancy,
+            "key_skills": [{"name": t} for t in techs],
+            "description": f"<p>{vacancy['name']}</p><ul>{''.join(f'<li>{t}</li>' for t in techs)}</ul>",
+        })
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/vacancies", search)
+    app.router.add_get("/vacancies/{vacancy_id}", details)
+    return app
+
+
+def _published(vacancy: Dict) -> datetime:
+    return datetime.strptime(vacancy["published_at"], "%Y-%m-%dT%H:%M:%S%z")
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """date_from / date_to in either ISO form HHParser sends (+03:00 or +0300)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=MOSCOW_TZ)
+
+
+def run_in_thread(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, threading.Event]:
+    """
+    Запуск сервера в фоновом потоке
+
+    Возвращает базовый URL поиска (для HHParser.BASE_URL) и событие,
+    установка которого останавливает сервер.
+    """
+    started = threading.Event()
+    stop = threading.Event()
+    address = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, host, port)
+        loop.run_until_complete(site.start())
+        address["port"] = runner.addresses[0][1]
+        started.set()
+        while not stop.is_set():
+            loop.run_until_complete(asyncio.sleep(0.1))
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+    threading.Thread(target=serve, daemon=True, name="fake-hh-server").start()
+    started.wait()
+    return f"http://{host}:{address['port']}/vacancies", stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the HH.ru vacancies API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--total", type=int, default=None, help="number of vacancies (default: all from parseddata)")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    vacancies = build_vacancies(args.total)
+    app = create_app(vacancies, args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate)
+    logger.info(f"Serving {len(vacancies)} vacancies on http://{args.host}:{args.port}/vacancies")
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.snapshots import SnapshotStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def import_dumps(store: SnapshotStore, source_dir: Path) -> int:
+    """Перенос дампов parseddata/vacancies_<ts>.json в хранилище снимков, run_id = <ts>"""
+    existing = set(store.runs())
+    imported = 0
+    for path in sorted(source_dir.glob("vacancies_*.json")):
+        run_id = path.stem[len("vacancies_"):]
+        if run_id in existing:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            vacancies = json.load(f)
+        store.save(vacancies, run_id=run_id, source_file=path.name)
+        imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import parseddata/vacancies_*.json dumps into the snapshot store")
+    parser.add_argument("--source-dir", default="parseddata")
+    parser.add_argument("--snapshot-dir", default=None, help="store location (default: SNAPSHOT_DIR)")
+    args = parser.parse_args()
+
+    source_dir = Path(args.source_dir)
+    store = SnapshotStore(args.snapshot_dir)
+    imported = import_dumps(store, source_dir)
+
+    dumps_size = sum(path.stat().st_size for path in source_dir.glob("vacancies_*.json"))
+    logger.info(f"Imported {imported} dumps; JSON dumps: {dumps_size / 1024:.0f} KB, "
+                f"snapshot store: {store.disk_usage() / 1024:.0f} KB")
+
+    # Проверка: каждый снимок восстанавливается в исходный дамп
+    for run_id in store.runs():
+        path = source_dir / f"vacancies_{run_id}.json"
+        if not path.exists():
+            continue
+        started = time.perf_counter()
+        vacancies = SnapshotStore(args.snapshot_dir).load(run_id)
+        elapsed = (time.perf_counter() - started) * 1000
+        with open(path, "r", encoding="utf-8") as f:
+            if json.load(f) != vacancies:
+                logger.error(f"Snapshot {run_id} differs from {path.name}")
+                continue
+        logger.info(f"Snapshot {run_id}: {len(vacancies)} vacancies restored in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import sys
+import os
+import time
+import logging
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.database import get_db, init_db
+from storage.rollups import rebuild_rollups
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Пересчет дневных агрегатов vacancy_daily_stats по таблице вакансий"""
+    init_db()
+    db = next(get_db())
+    try:
+        started = time.perf_counter()
+        rows = rebuild_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Rebuilt {rows} rollup rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import logging
+
+from sqlalchemy import bindparam, update
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.database import get_db, init_db
+from storage.models import Vacancy
+from storage.rollups import ROLLUP_SOURCE_COLUMNS, update_rollups
+from storage.technologies import sync_technologies
+from storage.versions import bump_data_version
+from parsers.base import FINGERPRINT_FIELDS, vacancy_fingerprint
+from parsers.tech_matcher import extract_tech_stack
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def retag_vacancies(batch_size: int = 1000) -> int:
+    """Приведение сохраненных технологий к каноническим названиям (golang -> go и т.п.)"""
+    db = next(get_db())
+    table = Vacancy.__table__
+    retagged = []
+    changes = []
+    previous = []
+    current = []
+    try:
+        for vacancy in db.query(Vacancy).filter(Vacancy.tech_stack != "").yield_per(batch_size):
+            tech_stack = ",".join(extract_tech_stack(vacancy.tech_stack.replace(",", " ")))
+            if tech_stack != vacancy.tech_stack:
+                row = {column.key: getattr(vacancy, column.key) for column in ROLLUP_SOURCE_COLUMNS}
+                previous.append(row)
+                current.append({**row, "tech_stack": tech_stack})
+                fields = {field: getattr(vacancy, field) for field in FINGERPRINT_FIELDS}
+                changes.append({
+                    "vacancy_id": vacancy.id,
+                    "tech_stack": tech_stack,
+                    # Отпечаток должен совпадать со строкой, иначе следующий сбор сравнит не то
+                    "content_hash": vacancy_fingerprint({**fields, "tech_stack": tech_stack}),
+                })
+                retagged.append((vacancy.id, tech_stack))
+        # updated_at закреплен: перетегирование не обновление вакансии, и архивирование
+        # по updated_at не должно откладываться (как в миграции 4)
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("vacancy_id"))
+            .values(tech_stack=bindparam("tech_stack"), content_hash=bindparam("content_hash"),
+                    updated_at=table.c.updated_at)
+        )
+        # Связи с технологиями и дневные агрегаты обновляются вместе с tech_stack
+        for start in range(0, len(retagged), batch_size):
+            db.execute(statement, changes[start:start + batch_size])
+            sync_technologies(db, retagged[start:start + batch_size])
+        update_rollups(db, removed=previous, added=current)
+        if retagged:
+            bump_data_version(db)
+        db.commit()
+        updated = len(retagged)
+    finally:
+        db.close()
+    logger.info(f"Retagged {updated} vacancies")
+    return updated
+
+
+if __name__ == "__main__":
+    init_db()
+    retag_vacancies()
@@ -0,0 +1,35 @@
+import sys
+import os
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.database import get_db, init_db
+from storage.retention import archive_expired_vacancies
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Архивация в Parquet и удаление вакансий, не обновлявшихся дольше --days дней"""
+    parser = argparse.ArgumentParser(description="Archive and delete vacancies not updated for --days days")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=None, help="vacancies per transaction (default: RETENTION_BATCH_SIZE)")
+    parser.add_argument("--archive-dir", default=None, help="archive location (default: ARCHIVE_DIR)")
+    args = parser.parse_args()
+
+    init_db()
+    db = next(get_db())
+    try:
+        cutoff = datetime.now() - timedelta(days=args.days)
+        archive_expired_vacancies(db, cutoff, batch_size=args.batch_size, archive_dir=args.archive_dir)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -38,9 +38,29 @@ def run_collector():
     except Exception as e:
         logger.error(f"Error running data collector: {str(e)}")
 
+def run_retention():
+    """Архивация и удаление устаревших вакансий"""
+    try:
+        logger.info("Starting retention job")
+        result = subprocess.run(
+            [sys.executable, "scripts/run_retention.py"],
+            capture_output=True,
+            text=True
+        )
+        
+        if result.returncode == 0:
+            logger.info("Retention completed successfully")
+        else:
+            logger.error(f"Retention failed with error: {result.stderr}")
+            
+    except Exception as e:
+        logger.error(f"Error running retention: {str(e)}")
+
 def main():
     # Запускаем сбор данных каждый день в 00:00
     schedule.every().day.at("00:00").do(run_collector)
+    # Архивация старых вакансий - после сбора, в 03:00
+    schedule.every().day.at("03:00").do(run_retention)
     
     # Также запускаем сразу при старте скрипта
     run_collector()
@@ -1,17 +1,131 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from typing import Dict, Optional
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Use SQLite instead of PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./jobmonitor.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Applied to every SQLite connection. The API, the bot and the scheduled
+# collector write to the same file: WAL lets readers run during a write,
+# busy_timeout makes writers queue instead of failing with "database is locked"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),  # durable in WAL mode except on power loss
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative is KiB, i.e. 64 MB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# asyncio drivers used by the API for each database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Connections kept per process (QueuePool)
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+}
+
+def create_db_engine(url: str = DATABASE_URL, pragmas: Optional[Dict] = None) -> Engine:
+    """
+    Engine with the connection profile of the database
+
+    SQLite connections get `pragmas` (SQLITE_PRAGMAS by default), other
+    databases get pool settings and pre-ping. In-memory SQLite keeps
+    SQLAlchemy's single connection pool.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, pool_pre_ping=True, **POOL_SETTINGS)
+
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": pragmas.get("busy_timeout", 5000) / 1000,
+        },
+        **({} if _in_memory(url) else POOL_SETTINGS)
+    )
+    _use_sqlite_pragmas(engine, pragmas)
+    return engine
+
+def create_async_db_engine(url: str = DATABASE_URL, pragmas: Optional[Dict] = None) -> AsyncEngine:
+    """
+    Async counterpart of create_db_engine (aiosqlite for SQLite, asyncpg for PostgreSQL)
+
+    Same database URL and profile; the driver in the URL is swapped for the
+    asyncio one.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != "sqlite":
+        return create_async_engine(url, pool_pre_ping=True, **POOL_SETTINGS)
+
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    engine = create_async_engine(
+        url,
+        connect_args={"timeout": pragmas.get("busy_timeout", 5000) / 1000},
+        # aiosqlite defaults to NullPool, which opens a connection thread per session
+        **({} if _in_memory(url) else {"poolclass": AsyncAdaptedQueuePool, **POOL_SETTINGS})
+    )
+    _use_sqlite_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+def _in_memory(url) -> bool:
+    return url.database in (None, "", ":memory:")
+
+def _use_sqlite_pragmas(engine: Engine, pragmas: Dict) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def log_engine_settings(engine: Engine) -> Dict:
+    """Log and return the settings the database actually runs with"""
+    settings = {"dialect": engine.dialect.name, "pool": engine.pool.status()}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in SQLITE_PRAGMAS:
+                settings[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    logger.info(f"Database settings: {settings}")
+    return settings
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Created on first use, so processes without the async driver installed
+# (bot, scripts) can still import this module
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
 def get_db():
     db = SessionLocal()
     try:
@@ -19,6 +133,36 @@ def get_db():
     finally:
         db.close()
 
+def dialect_insert(db):
+    """INSERT construct with ON CONFLICT support for the database of a session or connection"""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return insert
+
+def async_session() -> AsyncSession:
+    """New AsyncSession, for code running outside a request (background jobs)"""
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+async def get_async_db():
+    async with async_session() as db:
+        yield db
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections; aiosqlite connection threads keep the process alive otherwise"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
 def init_db():
     from .models import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    from .migrations import run_migrations
+    Base.metadata.create_all(bind=engine)
+    # Bring databases created by older versions up to date (indexes etc.)
+    run_migrations(engine)
+    log_engine_settings(engine) 
\ No newline at end of file
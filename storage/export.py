@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Dict, Iterable, Mapping
+import csv
+import io
+import json
+import os
+import zlib
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from .models import Vacancy
+
+# Rows fetched from the server-side cursor, and encoded, at a time
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Columns of a vacancy in API responses and exports, selected as plain tuples
+VACANCY_COLUMNS = (Vacancy.id, Vacancy.title, Vacancy.company, Vacancy.city, Vacancy.tech_stack,
+                   Vacancy.salary_from, Vacancy.salary_to, Vacancy.currency, Vacancy.url, Vacancy.source,
+                   Vacancy.created_at, Vacancy.updated_at)
+VACANCY_FIELDS = [column.key for column in VACANCY_COLUMNS]
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_statement(since: datetime) -> Select:
+    """SELECT of the exported columns of vacancies created since `since`, fetched EXPORT_BATCH_SIZE rows at a time"""
+    return (
+        select(*VACANCY_COLUMNS)
+        .where(Vacancy.created_at >= since)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _record(row: Mapping) -> Dict:
+    record = dict(row)
+    for field in ("created_at", "updated_at"):
+        if record[field] is not None:
+            record[field] = record[field].isoformat()
+    return record
+
+
+class ExportEncoder:
+    """
+    Encodes export rows batch by batch as a JSON array, NDJSON or CSV
+
+    start(), encode() of every batch and finish() return the consecutive
+    chunks of the document, so an export never holds more than one batch.
+    With `compress` the chunks form one gzip stream; each batch is flushed,
+    so the client can decode everything received so far.
+    """
+
+    def __init__(self, format: str, compress: bool = False):
+        if format not in MEDIA_TYPES:
+            raise ValueError(f"Unknown export format: {format}")
+        self.format = format
+        self.media_type = MEDIA_TYPES[format]
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31: gzip container
+        self._first = True
+
+    def start(self) -> bytes:
+        if self.format == "json":
+            return self._output("[")
+        if self.format == "csv":
+            return self._output(self._csv_lines([VACANCY_FIELDS]))
+        return self._output("")
+
+    def encode(self, rows: Iterable[Mapping]) -> bytes:
+        records = [_record(row) for row in rows]
+        if not records:
+            return b""
+        if self.format == "csv":
+            return self._output(self._csv_lines([record[field] for field in VACANCY_FIELDS] for record in records))
+
+        lines = [json.dumps(record, ensure_ascii=False) for record in records]
+        if self.format == "ndjson":
+            return self._output("\n".join(lines) + "\n")
+        text = ("\n" if self._first else ",\n") + ",\n".join(lines)
+        self._first = False
+        return self._output(text)
+
+    def finish(self) -> bytes:
+        data = self._output("\n]\n" if self.format == "json" else "", flush=False)
+        if self._compressor is not None:
+            data += self._compressor.flush(zlib.Z_FINISH)
+        return data
+
+    def _csv_lines(self, rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def _output(self, text: str, flush: bool = True) -> bytes:
+        data = text.encode("utf-8")
+        if self._compressor is None:
+            return data
+        data = self._compressor.compress(data)
+        return data + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import os
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from parsers.base import vacancy_fingerprint
+
+from .database import dialect_insert
+from .models import Vacancy
+from .rollups import ROLLUP_SOURCE_COLUMNS, update_rollups
+from .technologies import sync_technologies
+from .versions import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Rows looked up and written per statement
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+
+# Columns a parser may change on an existing vacancy
+UPDATABLE_COLUMNS = ["title", "company", "city", "tech_stack", "salary_from", "salary_to", "currency", "source",
+                     "content_hash"]
+
+
+def _row(vacancy: Dict) -> Dict:
+    """Vacancy dict reduced to the columns of the vacancies table"""
+    row = {column: vacancy.get(column) for column in UPDATABLE_COLUMNS + ["url"]}
+    # Parsers set the fingerprint at parse time, rows from elsewhere get it here
+    if not row["content_hash"]:
+        row["content_hash"] = vacancy_fingerprint(row)
+    return row
+
+
+def _batches(rows: List[Dict], size: int) -> Iterable[List[Dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def upsert_vacancies(db: Session,
+                     vacancies: List[Dict],
+                     update_existing: bool = True,
+                     batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Store parsed vacancies in batches and return new/updated/skipped counts
+
+    Each batch costs one SELECT of (url, content_hash) of the existing rows,
+    answered from the ix_vacancies_url_content_hash index alone, and one
+    INSERT ... ON CONFLICT (url) DO UPDATE with the new and changed rows.
+    Rows whose fingerprint matches are not written at all. The update is
+    also guarded by comparing fingerprints, so updated_at only moves when
+    something really changed. With update_existing=False existing
+    vacancies are left as they are (ON CONFLICT DO NOTHING).
+
+    Every batch is one write transaction, opened by the data version bump
+    before anything is read, so concurrent writers (job workers, the bot,
+    the collector) store their batches one after the other. The counts,
+    technology links and daily rollups come from the rows the INSERT
+    returns, i.e. the rows it actually wrote.
+    """
+    insert = dialect_insert(db)
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    counts = {"new": 0, "updated": 0, "skipped": 0}
+
+    # The last occurrence of a URL wins, as it did with row by row upserts
+    rows = list({vacancy["url"]: _row(vacancy) for vacancy in vacancies}.values())
+    counts["skipped"] += len(vacancies) - len(rows)
+
+    for batch in _batches(rows, batch_size):
+        # The bump is the first write, so it takes the write lock (SQLite)
+        # or the data_versions row lock (PostgreSQL) before the reads below
+        bump_data_version(db)
+        existing = dict(db.execute(
+            select(Vacancy.url, Vacancy.content_hash)
+            .where(Vacancy.url.in_([row["url"] for row in batch]))
+        ).all())
+
+        changed = [
+            row for row in batch
+            if row["url"] not in existing or (update_existing and existing[row["url"]] != row["content_hash"])
+        ]
+        counts["skipped"] += len(batch) - len(changed)
+        if not changed:
+            db.rollback()
+            continue
+
+        stmt = insert(Vacancy.__table__)
+        if update_existing:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Vacancy.url],
+                set_={
+                    **{column: stmt.excluded[column] for column in UPDATABLE_COLUMNS},
+                    "updated_at": datetime.now(),
+                },
+                where=Vacancy.__table__.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Vacancy.url])
+
+        updated_urls = [row["url"] for row in changed if row["url"] in existing]
+        previous = {
+            row["url"]: row
+            for row in db.execute(
+                select(Vacancy.url, *ROLLUP_SOURCE_COLUMNS).where(Vacancy.url.in_(updated_urls))
+            ).mappings()
+        } if updated_urls else {}
+
+        stored = db.execute(stmt.returning(Vacancy.id, Vacancy.url, *ROLLUP_SOURCE_COLUMNS), changed).all()
+        new = [row for row in stored if row.url not in previous]
+        counts["new"] += len(new)
+        counts["updated"] += len(stored) - len(new)
+        counts["skipped"] += len(changed) - len(stored)
+
+        sync_technologies(db, [(row.id, row.tech_stack) for row in stored])
+        update_rollups(db,
+                       removed=[previous[row.url] for row in stored if row.url in previous],
+                       added=[row._mapping for row in stored])
+        db.commit()
+
+    logger.info(
+        f"Stored vacancies: {counts['new']} new, {counts['updated']} updated, "
+        f"{counts['skipped']} skipped"
+    )
+    return counts
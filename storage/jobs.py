@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import socket
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .database import async_session
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Concurrent jobs per API process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# How often idle workers look for jobs queued by other processes
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# A running job whose worker has not reported for this long was abandoned (process killed) and is run again
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# handler(params, report_progress) -> result
+JobHandler = Callable[[Dict, Callable[[Dict], Awaitable[None]]], Awaitable[Dict]]
+
+
+def _active_job(db: Session, dedup_key: str) -> Optional[Job]:
+    return db.execute(
+        select(Job).where(Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_STATUSES))
+    ).scalars().first()
+
+
+def submit_job(db: Session, kind: str, dedup_key: str, params: Dict) -> Tuple[Job, bool]:
+    """
+    Queue a job and return it with True, or the queued or running job with the same `dedup_key` and False
+
+    A partial unique index on dedup_key over the active jobs makes the
+    check safe against concurrent submissions from other processes.
+    """
+    job = _active_job(db, dedup_key)
+    if job is not None:
+        return job, False
+
+    job = Job(kind=kind, dedup_key=dedup_key, params=params, status=QUEUED, created_at=datetime.now())
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        job = _active_job(db, dedup_key)
+        if job is None:
+            raise
+        return job, False
+    return job, True
+
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+
+def requeue_stale_jobs(db: Session, stale_seconds: Optional[int] = None) -> int:
+    """
+    Queue again the running jobs whose worker stopped reporting, and return their number
+
+    Jobs that were already tried JOB_MAX_ATTEMPTS times are failed instead.
+    """
+    cutoff = datetime.now() - timedelta(seconds=stale_seconds or JOB_STALE_SECONDS)
+    stale = db.execute(
+        select(Job.id, Job.attempts).where(Job.status == RUNNING, Job.heartbeat_at < cutoff)
+    ).all()
+    for job_id, attempts in stale:
+        if attempts >= JOB_MAX_ATTEMPTS:
+            values = {"status": FAILED, "error": f"Abandoned after {attempts} attempts", "finished_at": datetime.now()}
+        else:
+            values = {"status": QUEUED, "worker": None}
+        db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(**values))
+    if stale:
+        db.commit()
+        logger.warning(f"Requeued or failed {len(stale)} abandoned jobs")
+    return len(stale)
+
+
+def claim_job(db: Session, worker: str) -> Optional[Job]:
+    """
+    Mark the oldest queued job as running on `worker` and return it, None when the queue is empty
+
+    The claim is a conditional UPDATE, so a job is only ever taken by one
+    worker, whichever process it runs in.
+    """
+    requeue_stale_jobs(db)
+    while True:
+        job_id = db.execute(
+            select(Job.id).where(Job.status == QUEUED).order_by(Job.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+        now = datetime.now()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, worker=worker, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+
+
+def report_progress(db: Session, job_id: int, progress: Dict) -> None:
+    db.execute(update(Job).where(Job.id == job_id).values(progress=progress, heartbeat_at=datetime.now()))
+    db.commit()
+
+
+def finish_job(db: Session, job_id: int, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    now = datetime.now()
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status=FAILED if error else SUCCEEDED, result=result, error=error, finished_at=now, heartbeat_at=now)
+    )
+    db.commit()
+
+
+def release_job(db: Session, job_id: int) -> None:
+    """Put a job interrupted by a shutdown back in the queue"""
+    db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(status=QUEUED, worker=None))
+    db.commit()
+
+
+def job_to_dict(job: Job) -> Dict:
+    end = job.finished_at or (datetime.now() if job.status == RUNNING else None)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "queued_seconds": ((job.started_at or datetime.now()) - job.created_at).total_seconds() if job.created_at else None,
+        "run_seconds": (end - job.started_at).total_seconds() if job.started_at and end else None,
+    }
+
+
+class JobRunner:
+    """
+    Runs the jobs of the `jobs` table on JOB_WORKERS asyncio workers
+
+    Handlers are registered per job kind and get the job params and an
+    async report_progress(dict) callback; their return value is stored as
+    the job result, an exception as its error. The queue lives in the
+    database: jobs survive restarts, several API processes share it, and a
+    job interrupted by a shutdown is queued again.
+    """
+
+    def __init__(self, workers: Optional[int] = None, poll_seconds: Optional[float] = None):
+        self.workers = workers or JOB_WORKERS
+        self.poll_seconds = poll_seconds or JOB_POLL_SECONDS
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def handler(self, kind: str):
+        """Decorator registering the handler of a job kind"""
+        def register(func: JobHandler) -> JobHandler:
+            self.handlers[kind] = func
+            return func
+        return register
+
+    async def submit(self, kind: str, dedup_key: str, params: Dict) -> Tuple[Job, bool]:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        async with async_session() as db:
+            job, created = await db.run_sync(submit_job, kind, dedup_key, params)
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return job, created
+
+    async def get(self, job_id: int) -> Optional[Job]:
+        async with async_session() as db:
+            return await db.run_sync(get_job, job_id)
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._work(f"{prefix}:{n}")) for n in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self, worker: str) -> None:
+        while True:
+            try:
+                async with async_session() as db:
+                    job = await db.run_sync(claim_job, worker)
+            except Exception as e:
+                logger.error(f"Job worker {worker} failed to claim a job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        async def report(progress: Dict) -> None:
+            async with async_session() as db:
+                await db.run_sync(report_progress, job.id, progress)
+
+        logger.info(f"Running job {job.id} ({job.kind}, {job.params})")
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job.kind}")
+            result = await handler(job.params, report)
+        except asyncio.CancelledError:
+            async with async_session() as db:
+                await db.run_sync(release_job, job.id)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            async with async_session() as db:
+                await db.run_sync(finish_job, job.id, None, str(e))
+        else:
+            async with async_session() as db:
+                await db.run_sync(finish_job, job.id, result)
+            logger.info(f"Job {job.id} ({job.kind}) finished: {result}")
@@ -0,0 +1,160 @@
+from typing import Callable, List, NamedTuple
+import logging
+
+from sqlalchemy import bindparam, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from parsers.base import FINGERPRINT_FIELDS, vacancy_fingerprint
+
+from .models import CrawlWatermark, SchemaVersion, Vacancy, VacancyDailyStat
+from .rollups import rebuild_rollups
+from .search import create_search_index
+from .technologies import sync_technologies
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """
+    Register an upgrade step of the schema
+
+    Steps run once per database in version order. They must be idempotent
+    (CREATE ... IF NOT EXISTS etc.): a fresh database already has the
+    current schema from create_all, and two processes may start at once.
+    """
+    def decorator(upgrade: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return upgrade
+    return decorator
+
+
+@migration(1, "per-source crawl watermarks")
+def _crawl_watermarks_source(conn: Connection) -> None:
+    # Watermarks only save work, so a table from before the source column
+    # is recreated; the next crawl of each query is a full one
+    columns = {c["name"] for c in inspect(conn).get_columns("crawl_watermarks")}
+    if "source" not in columns:
+        CrawlWatermark.__table__.drop(conn)
+        CrawlWatermark.__table__.create(conn)
+
+
+@migration(2, "vacancy indexes for date ranges, cleanup and city stats")
+def _vacancy_indexes(conn: Connection) -> None:
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_created_at ON vacancies (created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_updated_at ON vacancies (updated_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_city ON vacancies (city)"))
+
+
+@migration(3, "technology links backfilled from vacancies.tech_stack")
+def _backfill_technologies(conn: Connection, batch_size: int = 1000) -> None:
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Vacancy.id, Vacancy.tech_stack)
+            .where(Vacancy.id > last_id)
+            .order_by(Vacancy.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        sync_technologies(conn, rows)
+        last_id = rows[-1].id
+
+
+@migration(4, "vacancy content fingerprints")
+def _content_hash(conn: Connection, batch_size: int = 1000) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("vacancies")}
+    if "content_hash" not in columns:
+        conn.execute(text("ALTER TABLE vacancies ADD COLUMN content_hash VARCHAR"))
+
+    fields = [getattr(Vacancy, field) for field in FINGERPRINT_FIELDS]
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Vacancy.id, *fields)
+            .where(Vacancy.id > last_id, Vacancy.content_hash.is_(None))
+            .order_by(Vacancy.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        table = Vacancy.__table__
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("vacancy_id"))
+            # Pinned, so onupdate does not reset the history retention relies on
+            .values(content_hash=bindparam("content_hash"), updated_at=table.c.updated_at),
+            [{"vacancy_id": row.id, "content_hash": vacancy_fingerprint(row._mapping)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_url_content_hash ON vacancies (url, content_hash)"))
+    # Statistics let the planner prefer this covering index over the unique url index
+    conn.execute(text("ANALYZE vacancies"))
+
+
+@migration(5, "daily vacancy rollups")
+def _daily_rollups(conn: Connection) -> None:
+    VacancyDailyStat.__table__.create(conn, checkfirst=True)
+    if not conn.execute(select(func.count()).select_from(VacancyDailyStat)).scalar():
+        rebuild_rollups(conn)
+
+
+@migration(6, "full-text search index of vacancies")
+def _search_index(conn: Connection) -> None:
+    create_search_index(conn)
+
+
+@migration(7, "vacancy indexes for the filters and keyset of GET /vacancies/")
+def _filter_indexes(conn: Connection) -> None:
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_city_created_at ON vacancies (city, created_at, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_source_created_at ON vacancies (source, created_at, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_currency_salary_from ON vacancies (currency, salary_from)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vacancies_salary_from ON vacancies (salary_from)"))
+    conn.execute(text("ANALYZE vacancies"))
+
+
+def current_version(conn: Connection) -> int:
+    """Latest applied migration, 0 for a database never migrated"""
+    versions = conn.execute(select(SchemaVersion.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply pending migrations, each in its own transaction, and return the schema version
+
+    Expects the tables to exist already (init_db runs create_all first).
+    """
+    SchemaVersion.__table__.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    for step in MIGRATIONS:
+        if step.version <= version:
+            continue
+        logger.info(f"Applying migration {step.version}: {step.description}")
+        try:
+            with engine.begin() as conn:
+                step.upgrade(conn)
+                conn.execute(SchemaVersion.__table__.insert().values(
+                    version=step.version,
+                    description=step.description
+                ))
+        except IntegrityError:
+            # Another process recorded the same step first
+            logger.info(f"Migration {step.version} was applied concurrently")
+        version = step.version
+
+    return version
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, JSON, Text, UniqueConstraint, create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -21,6 +21,135 @@ class Vacancy(Base):
     source = Column(String, nullable=False)  # e.g., 'hh.ru', 'djinni'
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    content_hash = Column(String)  # parsers.base.vacancy_fingerprint() of the stored fields
+
+    # Existing databases get these from storage/migrations.py
+    __table_args__ = (
+        Index('ix_vacancies_created_at', 'created_at'),  # export, analyzer ranges, latest vacancy
+        Index('ix_vacancies_updated_at', 'updated_at'),  # cleanup
+        Index('ix_vacancies_city', 'city'),  # stats by city
+        Index('ix_vacancies_url_content_hash', 'url', 'content_hash'),  # change detection on ingest
+        # Filters of GET /vacancies/, each ordered like its keyset (created_at, id)
+        Index('ix_vacancies_city_created_at', 'city', 'created_at', 'id'),
+        Index('ix_vacancies_source_created_at', 'source', 'created_at', 'id'),
+        Index('ix_vacancies_currency_salary_from', 'currency', 'salary_from'),
+        Index('ix_vacancies_salary_from', 'salary_from'),
+    )
+
+    def __repr__(self):
+        return f"<Vacancy(id={self.id}, title='{self.title}', company='{self.company}')>" 
+
+class Technology(Base):
+    """Технология из tech_stack вакансий (python, django, ...)"""
+    __tablename__ = 'technologies'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Technology(id={self.id}, name='{self.name}')>"
+
+class VacancyTechnology(Base):
+    """Связь вакансии с технологией, нормализованная копия Vacancy.tech_stack"""
+    __tablename__ = 'vacancy_technologies'
+
+    vacancy_id = Column(Integer, ForeignKey('vacancies.id', ondelete='CASCADE'), primary_key=True)
+    technology_id = Column(Integer, ForeignKey('technologies.id', ondelete='CASCADE'), primary_key=True)
+
+    # Vacancies of a technology, counts per technology
+    __table_args__ = (Index('ix_vacancy_technologies_technology_id', 'technology_id', 'vacancy_id'),)
+
+    def __repr__(self):
+        return f"<VacancyTechnology(vacancy_id={self.vacancy_id}, technology_id={self.technology_id})>"
+
+class VacancyDailyStat(Base):
+    """Дневной агрегат вакансий (storage/rollups.py): technology='*' - все вакансии, иначе - с этой технологией"""
+    __tablename__ = 'vacancy_daily_stats'
+
+    day = Column(Date, primary_key=True)  # date of Vacancy.created_at
+    source = Column(String, primary_key=True)
+    city = Column(String, primary_key=True)  # '' when the vacancy has no city
+    technology = Column(String, primary_key=True)
+    currency = Column(String, primary_key=True)  # '' when the salary has no currency
+    vacancy_count = Column(Integer, nullable=False, default=0)
+    salary_from_count = Column(Integer, nullable=False, default=0)
+    salary_from_sum = Column(Float, nullable=False, default=0)
+    salary_from_sumsq = Column(Float, nullable=False, default=0)
+    salary_to_count = Column(Integer, nullable=False, default=0)
+    salary_to_sum = Column(Float, nullable=False, default=0)
+    salary_to_sumsq = Column(Float, nullable=False, default=0)
+
+    # Reads go by technology ('*' or a name) over a range of days
+    __table_args__ = (Index('ix_vacancy_daily_stats_technology_day', 'technology', 'day'),)
+
+    def __repr__(self):
+        return f"<VacancyDailyStat(day={self.day}, city='{self.city}', technology='{self.technology}', vacancy_count={self.vacancy_count})>"
+
+class CrawlWatermark(Base):
+    """Отметка последнего инкрементального сбора по (источник, запрос, регион)"""
+    __tablename__ = 'crawl_watermarks'
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String, nullable=False, default='hh.ru')
+    query = Column(String, nullable=False)
+    area = Column(Integer, nullable=False)
+    last_published_at = Column(String)  # Raw HH.ru timestamp, e.g. 2025-06-02T12:00:00+0300
+    last_full_sync_at = Column(DateTime)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint('source', 'query', 'area', name='uq_crawl_watermarks_source_query_area'),)
+
+    def __repr__(self):
+        return f"<CrawlWatermark(source='{self.source}', query='{self.query}', area={self.area}, last_published_at='{self.last_published_at}')>"
+
+class DataVersion(Base):
+    """Счетчик изменений данных (storage/versions.py), по нему сбрасываются кэши"""
+    __tablename__ = 'data_versions'
+
+    name = Column(String, primary_key=True)  # e.g. 'vacancies'
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DataVersion(name='{self.name}', version={self.version})>"
+
+class Job(Base):
+    """Фоновая задача API (storage/jobs.py), например сбор вакансий"""
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # e.g. 'refresh', 'collect'
+    dedup_key = Column(String, nullable=False)  # submissions with the same key share one active job
+    params = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    progress = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    worker = Column(String)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # At most one queued or running job per key
+        Index('uq_jobs_active_dedup_key', 'dedup_key', unique=True,
+              sqlite_where=text("status IN ('queued', 'running')"),
+              postgresql_where=text("status IN ('queued', 'running')")),
+        Index('ix_jobs_status_id', 'status', 'id'),  # oldest queued job
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
+
+class SchemaVersion(Base):
+    """Примененные миграции схемы (storage/migrations.py)"""
+    __tablename__ = 'schema_version'
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=func.now())
 
     def __repr__(self):
-        return f"<Vacancy(id={self.id}, title='{self.title}', company='{self.company}')>" 
\ No newline at end of file
+        return f"<SchemaVersion(version={self.version}, description='{self.description}')>"
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional, Tuple, Union
+import base64
+import binascii
+
+from sqlalchemy import String, literal, select, tuple_, type_coerce
+from sqlalchemy.sql import Select
+
+from .export import VACANCY_COLUMNS
+from .models import Vacancy
+
+CursorKey = Union[str, datetime]
+
+
+def _created_at_key(dialect: str):
+    # SQLite keeps DATETIME as text in the format of whoever wrote it:
+    # CURRENT_TIMESTAMP has no microseconds, Python datetimes have them. The
+    # cursor carries the stored text, so the keyset comparison is exact.
+    if dialect == "sqlite":
+        return type_coerce(Vacancy.created_at, String)
+    return Vacancy.created_at
+
+
+def encode_cursor(created_at_key: CursorKey, vacancy_id: int) -> str:
+    """Opaque cursor of the position after a vacancy"""
+    if isinstance(created_at_key, datetime):
+        created_at_key = created_at_key.isoformat()
+    raw = f"{created_at_key}|{vacancy_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(dialect: str, cursor: str) -> Tuple[CursorKey, int]:
+    """(created_at key, id) of a cursor; ValueError when it was not made by encode_cursor()"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at_key, separator, vacancy_id = raw.rpartition("|")
+        if not separator:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if dialect == "sqlite":
+            datetime.fromisoformat(created_at_key)  # validated, compared as stored text
+            return created_at_key, int(vacancy_id)
+        return datetime.fromisoformat(created_at_key), int(vacancy_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def vacancy_page(dialect: str, cursor: Optional[str] = None) -> Select:
+    """
+    SELECT of vacancies newest first, (created_at, id) descending, starting after `cursor`
+
+    Rows are the VACANCY_COLUMNS followed by cursor_key; encode_cursor(cursor_key, id)
+    of the last row of a page is the cursor of the next one. Filters and the
+    limit are added by the caller. The position is a range condition on
+    (created_at, id), so every page is an index range scan, however deep.
+    """
+    key = _created_at_key(dialect)
+    query = select(*VACANCY_COLUMNS, key.label("cursor_key")).order_by(Vacancy.created_at.desc(), Vacancy.id.desc())
+    if cursor:
+        created_at_key, vacancy_id = decode_cursor(dialect, cursor)
+        if dialect == "sqlite":
+            created_at_key = literal(created_at_key, String)
+        query = query.where(tuple_(Vacancy.created_at, Vacancy.id) < tuple_(created_at_key, vacancy_id))
+    return query
@@ -0,0 +1,158 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import os
+import logging
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .models import Vacancy
+from .rollups import update_rollups
+from .technologies import delete_technology_links
+from .versions import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Vacancies archived and deleted per transaction
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive/vacancies")
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("city", pa.string()),
+    ("tech_stack", pa.string()),
+    ("salary_from", pa.float64()),
+    ("salary_to", pa.float64()),
+    ("currency", pa.string()),
+    ("url", pa.string()),
+    ("source", pa.string()),
+    ("content_hash", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us")),
+    ("archived_at", pa.timestamp("us")),
+])
+
+# Files are laid out as <archive>/created_date=YYYY-MM-DD/<batch>.parquet
+PARTITIONING = ds.partitioning(pa.schema([("created_date", pa.string())]), flavor="hive")
+
+
+def _write_partitions(rows: List[Dict], archive_dir: Path, batch_name: str) -> int:
+    """Write one batch as one zstd-compressed Parquet file per creation day"""
+    by_day: Dict[str, List[Dict]] = {}
+    for row in rows:
+        day = row["created_at"].strftime("%Y-%m-%d") if row["created_at"] else "unknown"
+        by_day.setdefault(day, []).append(row)
+
+    for day, day_rows in by_day.items():
+        partition = archive_dir / f"created_date={day}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"{batch_name}.parquet"
+        tmp_path = partition / f".{batch_name}.parquet.tmp"
+        pq.write_table(pa.Table.from_pylist(day_rows, schema=ARCHIVE_SCHEMA), tmp_path, compression="zstd")
+        # The rows are deleted right after, the file must be complete on disk first
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    return len(by_day)
+
+
+def archive_expired_vacancies(db: Session,
+                              cutoff: datetime,
+                              batch_size: Optional[int] = None,
+                              archive_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Move vacancies not updated since `cutoff` from the table to the Parquet archive
+
+    Works in batches of `batch_size` rows: each batch is written to the
+    archive, then deleted together with its technology links and daily
+    rollup counts in its own short transaction, so other writers
+    only wait for one batch at a time. The delete checks the cutoff
+    again, so a vacancy updated in the meantime stays. A batch whose
+    delete fails is archived again on the next run; readers of the
+    archive drop such duplicates by (id, updated_at).
+    """
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    columns = [getattr(Vacancy, field.name) for field in ARCHIVE_SCHEMA if field.name != "archived_at"]
+    stats = {"archived": 0, "deleted": 0, "files": 0}
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    batch_number = 0
+    while True:
+        rows = [
+            {**row._mapping, "archived_at": datetime.now()}
+            for row in db.execute(
+                select(*columns)
+                .where(Vacancy.updated_at < cutoff)
+                .order_by(Vacancy.updated_at, Vacancy.id)
+                .limit(batch_size)
+            )
+        ]
+        if not rows:
+            break
+
+        stats["files"] += _write_partitions(rows, archive_dir, f"{run_id}_{batch_number:05d}")
+        stats["archived"] += len(rows)
+
+        # A vacancy a crawl refreshed since the select keeps its new data;
+        # its archived copy is an older version, not a deletion
+        ids = [row["id"] for row in rows]
+        deleted_ids = set(db.execute(
+            delete(Vacancy)
+            .where(Vacancy.id.in_(ids), Vacancy.updated_at < cutoff)
+            .returning(Vacancy.id)
+        ).scalars())
+        update_rollups(db, removed=[row for row in rows if row["id"] in deleted_ids])
+        delete_technology_links(db, list(deleted_ids))
+        stats["deleted"] += len(deleted_ids)
+        bump_data_version(db)
+        db.commit()
+        batch_number += 1
+
+    logger.info(
+        f"Archived {stats['archived']} vacancies updated before {cutoff:%Y-%m-%d} "
+        f"to {stats['files']} files in {archive_dir}, deleted {stats['deleted']}"
+    )
+    return stats
+
+
+def read_archive(since: Optional[datetime] = None,
+                 until: Optional[datetime] = None,
+                 columns: Optional[List[str]] = None,
+                 archive_dir: Optional[str] = None):
+    """
+    Archived vacancies created in [since, until) as a pandas DataFrame
+
+    Only the partitions of the requested days are read. Rows archived more
+    than once are deduplicated.
+    """
+    archive_dir = Path(archive_dir or ARCHIVE_DIR)
+    if not archive_dir.exists():
+        return pa.Table.from_pylist([], schema=ARCHIVE_SCHEMA).to_pandas()
+
+    dataset = ds.dataset(archive_dir, format="parquet", partitioning=PARTITIONING,
+                         exclude_invalid_files=True)
+    # The partition key prunes whole days, created_at trims the edge days
+    conditions = []
+    if since:
+        conditions += [ds.field("created_date") >= since.strftime("%Y-%m-%d"),
+                       ds.field("created_at") >= pa.scalar(since, pa.timestamp("us"))]
+    if until:
+        conditions += [ds.field("created_date") <= until.strftime("%Y-%m-%d"),
+                       ds.field("created_at") < pa.scalar(until, pa.timestamp("us"))]
+    condition = None
+    for part in conditions:
+        condition = part if condition is None else condition & part
+
+    read_columns = None
+    if columns:
+        read_columns = list(dict.fromkeys(columns + ["id", "created_at", "updated_at"]))
+    frame = dataset.to_table(columns=read_columns, filter=condition).to_pandas()
+    frame = frame.drop_duplicates(subset=["id", "updated_at"])
+    return frame[columns] if columns else frame
@@ -0,0 +1,209 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+import math
+
+from sqlalchemy import delete, func, literal, select
+
+from .database import dialect_insert
+from .models import Technology, Vacancy, VacancyDailyStat, VacancyTechnology
+from .technologies import split_tech_stack
+from .versions import bump_data_version
+
+# technology of the rollup rows counting every vacancy
+ALL_TECHNOLOGIES = "*"
+
+# Vacancy columns a rollup contribution is computed from
+ROLLUP_SOURCE_COLUMNS = (Vacancy.created_at, Vacancy.source, Vacancy.city, Vacancy.currency,
+                         Vacancy.salary_from, Vacancy.salary_to, Vacancy.tech_stack)
+
+KEY_COLUMNS = ("day", "source", "city", "technology", "currency")
+MEASURES = ("vacancy_count",
+            "salary_from_count", "salary_from_sum", "salary_from_sumsq",
+            "salary_to_count", "salary_to_sum", "salary_to_sumsq")
+
+Day = Union[date, datetime]
+
+
+def _day(value: Day) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _add_contributions(totals: Dict[tuple, List[float]], vacancies: Iterable[Mapping], sign: int) -> None:
+    for vacancy in vacancies:
+        if vacancy["created_at"] is None:
+            continue
+        measures = [1, 0, 0, 0, 0, 0, 0]
+        for offset, field in ((1, "salary_from"), (4, "salary_to")):
+            value = vacancy[field]
+            if value is not None:
+                measures[offset] += 1
+                measures[offset + 1] += value
+                measures[offset + 2] += value * value
+        day = _day(vacancy["created_at"])
+        for technology in [ALL_TECHNOLOGIES] + split_tech_stack(vacancy["tech_stack"]):
+            key = (day, vacancy["source"], vacancy["city"] or "", technology, vacancy["currency"] or "")
+            acc = totals[key]
+            for i, measure in enumerate(measures):
+                acc[i] += sign * measure
+
+
+def update_rollups(db, removed: Iterable[Mapping] = (), added: Iterable[Mapping] = ()) -> None:
+    """
+    Apply a change of the vacancies table to vacancy_daily_stats
+
+    `removed` are the vacancies as they were before the change (deleted
+    rows, previous versions of updated rows), `added` the vacancies as they
+    are after it (new rows, new versions), both as mappings with the
+    ROLLUP_SOURCE_COLUMNS. Only the net difference is written, in one
+    upsert, and rollup rows left without vacancies are dropped. Works with
+    a Session or a Connection and leaves the commit to the caller.
+
+    Both must be read in the caller's write transaction, from the rows it
+    actually changed (RETURNING); rebuild_rollups() recomputes the rollups
+    from scratch.
+    """
+    totals: Dict[tuple, List[float]] = defaultdict(lambda: [0] * len(MEASURES))
+    _add_contributions(totals, removed, -1)
+    _add_contributions(totals, added, 1)
+    rows = [
+        {**dict(zip(KEY_COLUMNS, key)), **dict(zip(MEASURES, acc))}
+        for key, acc in totals.items()
+        if any(acc)
+    ]
+    if not rows:
+        return
+
+    table = VacancyDailyStat.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[column] for column in KEY_COLUMNS],
+        set_={measure: table.c[measure] + stmt.excluded[measure] for measure in MEASURES},
+    )
+    db.execute(stmt, rows)
+
+    shrunk_days = {row["day"] for row in rows if row["vacancy_count"] < 0}
+    if shrunk_days:
+        db.execute(delete(table).where(table.c.day.in_(shrunk_days), table.c.vacancy_count <= 0))
+
+
+def rebuild_rollups(db) -> int:
+    """
+    Recompute vacancy_daily_stats from the vacancies table and return the number of rollup rows
+
+    Runs as two INSERT ... SELECT ... GROUP BY statements; leaves the
+    commit to the caller, so readers see the old rollups until then.
+    """
+    table = VacancyDailyStat.__table__
+    day = func.date(Vacancy.created_at)
+    city = func.coalesce(Vacancy.city, "")
+    currency = func.coalesce(Vacancy.currency, "")
+    measures = [
+        func.count(),
+        func.count(Vacancy.salary_from),
+        func.coalesce(func.sum(Vacancy.salary_from), 0),
+        func.coalesce(func.sum(Vacancy.salary_from * Vacancy.salary_from), 0),
+        func.count(Vacancy.salary_to),
+        func.coalesce(func.sum(Vacancy.salary_to), 0),
+        func.coalesce(func.sum(Vacancy.salary_to * Vacancy.salary_to), 0),
+    ]
+    columns = [table.c[column] for column in KEY_COLUMNS + MEASURES]
+
+    all_vacancies = (
+        select(day, Vacancy.source, city, literal(ALL_TECHNOLOGIES), currency, *measures)
+        .where(Vacancy.created_at.is_not(None))
+        .group_by(day, Vacancy.source, city, currency)
+    )
+    by_technology = (
+        select(day, Vacancy.source, city, Technology.name, currency, *measures)
+        .select_from(Vacancy)
+        .join(VacancyTechnology, VacancyTechnology.vacancy_id == Vacancy.id)
+        .join(Technology, Technology.id == VacancyTechnology.technology_id)
+        .where(Vacancy.created_at.is_not(None))
+        .group_by(day, Vacancy.source, city, Technology.name, currency)
+    )
+
+    db.execute(delete(table))
+    db.execute(table.insert().from_select(columns, all_vacancies))
+    db.execute(table.insert().from_select(columns, by_technology))
+    bump_data_version(db)
+    return db.execute(select(func.count()).select_from(table)).scalar()
+
+
+def _in_range(query, since: Optional[Day], until: Optional[Day]):
+    if since:
+        query = query.where(VacancyDailyStat.day >= _day(since))
+    if until:
+        query = query.where(VacancyDailyStat.day < _day(until))
+    return query
+
+
+def _distribution(count: int, total: float, total_sq: float) -> Dict[str, Optional[float]]:
+    if not count:
+        return {"count": 0, "avg": None, "stddev": None}
+    avg = total / count
+    return {"count": count, "avg": avg, "stddev": math.sqrt(max(total_sq / count - avg * avg, 0.0))}
+
+
+def rollup_summary(db,
+                   since: Optional[Day] = None,
+                   until: Optional[Day] = None,
+                   technology: str = ALL_TECHNOLOGIES) -> Dict:
+    """
+    Number of vacancies created in [since, until) and their salary_from/salary_to count, avg and stddev
+
+    since/until are taken by day. `technology` restricts the vacancies to
+    the ones listing it.
+    """
+    if technology != ALL_TECHNOLOGIES:
+        technology = technology.strip().lower()
+    query = _in_range(
+        select(*[func.coalesce(func.sum(getattr(VacancyDailyStat, measure)), 0) for measure in MEASURES])
+        .where(VacancyDailyStat.technology == technology),
+        since, until
+    )
+    totals = db.execute(query).one()
+    return {
+        "vacancies": totals[0],
+        "salary_from": _distribution(*totals[1:4]),
+        "salary_to": _distribution(*totals[4:7]),
+    }
+
+
+def rollup_counts(db,
+                  dimension: str,
+                  since: Optional[Day] = None,
+                  until: Optional[Day] = None,
+                  limit: Optional[int] = None) -> Dict[Optional[str], int]:
+    """Number of vacancies per city, source or currency, most frequent first; None for ''"""
+    column = getattr(VacancyDailyStat, dimension)
+    count = func.sum(VacancyDailyStat.vacancy_count)
+    query = _in_range(
+        select(column, count)
+        .where(VacancyDailyStat.technology == ALL_TECHNOLOGIES)
+        .group_by(column)
+        .order_by(count.desc(), column),
+        since, until
+    )
+    if limit:
+        query = query.limit(limit)
+    return {value or None: total for value, total in db.execute(query)}
+
+
+def rollup_tech_counts(db,
+                       since: Optional[Day] = None,
+                       until: Optional[Day] = None,
+                       limit: Optional[int] = None) -> Dict[str, int]:
+    """Number of vacancies per technology, most frequent first; the rollup counterpart of tech_counts()"""
+    count = func.sum(VacancyDailyStat.vacancy_count)
+    query = _in_range(
+        select(VacancyDailyStat.technology, count)
+        .where(VacancyDailyStat.technology != ALL_TECHNOLOGIES)
+        .group_by(VacancyDailyStat.technology)
+        .order_by(count.desc(), VacancyDailyStat.technology),
+        since, until
+    )
+    if limit:
+        query = query.limit(limit)
+    return {technology: total for technology, total in db.execute(query)}
@@ -0,0 +1,128 @@
+from typing import List, Optional
+import os
+import re
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+from .export import VACANCY_COLUMNS
+from .models import Vacancy
+
+# Columns covered by the search, with their bm25 weights on SQLite
+SEARCH_COLUMNS = (("title", 10.0), ("company", 3.0), ("city", 2.0), ("tech_stack", 5.0))
+
+# External-content FTS5 index over vacancies, kept in sync by triggers
+FTS_TABLE = "vacancies_fts"
+_fts = table(FTS_TABLE, column("rowid"))
+
+# Generated tsvector column on PostgreSQL; 'simple' because vacancies mix Russian and English
+PG_SEARCH_CONFIG = "simple"
+PG_SEARCH_COLUMN = "search_vector"
+
+# Newest matches ranked per query on SQLite; bounds the bm25 work for common words
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "10000"))
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of a user query, lowercased; punctuation and FTS syntax are dropped"""
+    return [word.lower() for word in _WORD.findall(query or "")]
+
+
+def create_search_index(conn: Connection) -> None:
+    """
+    Create the full-text index of vacancies for the database of `conn` and fill it
+
+    Idempotent. On SQLite this is an FTS5 table reading its text from
+    vacancies (content=...), so only the index is stored, plus triggers
+    that mirror every insert, update and delete. On PostgreSQL it is a
+    stored generated tsvector column with a GIN index.
+    """
+    names = ", ".join(name for name, _ in SEARCH_COLUMNS)
+    if conn.dialect.name == "sqlite":
+        new_values = ", ".join(f"new.{name}" for name, _ in SEARCH_COLUMNS)
+        old_values = ", ".join(f"old.{name}" for name, _ in SEARCH_COLUMNS)
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{names}, content='vacancies', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS vacancies_fts_insert AFTER INSERT ON vacancies BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS vacancies_fts_delete AFTER DELETE ON vacancies BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END"
+        ))
+        # Only changes of the indexed columns touch the index (not updated_at etc.)
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS vacancies_fts_update AFTER UPDATE OF {names} ON vacancies BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.id, {new_values}); END"
+        ))
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif conn.dialect.name == "postgresql":
+        document = " || ' ' || ".join(f"coalesce({name}, '')" for name, _ in SEARCH_COLUMNS)
+        conn.execute(text(
+            f"ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS {PG_SEARCH_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{PG_SEARCH_CONFIG}', {document})) STORED"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_vacancies_{PG_SEARCH_COLUMN} ON vacancies USING GIN ({PG_SEARCH_COLUMN})"
+        ))
+    else:
+        raise NotImplementedError(f"Full-text search is not supported for {conn.dialect.name}")
+
+
+def search_statement(dialect: str, query: str, limit: int = 20, offset: int = 0) -> Optional[Select]:
+    """
+    SELECT of the VACANCY_COLUMNS of a page of the vacancies matching every word of `query`, best matches first
+
+    Returns None when the query has no words. On SQLite only the
+    SEARCH_MAX_CANDIDATES newest matches are ranked: the candidates are a
+    rowid range the FTS index reads directly, and ranking is done on the
+    index alone before the page of vacancies is fetched by id.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+
+    if dialect == "sqlite":
+        # Each word is quoted, so FTS5 operators in user input are plain text
+        match = " ".join(f'"{term}"' for term in terms)
+        fts = literal_column(FTS_TABLE)
+        oldest_candidate = (
+            select(_fts.c.rowid)
+            .where(fts.op("MATCH")(match))
+            .order_by(_fts.c.rowid.desc())
+            .offset(SEARCH_MAX_CANDIDATES - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        rank = func.bm25(fts, *[weight for _, weight in SEARCH_COLUMNS]).label("rank")
+        page = (
+            select(_fts.c.rowid.label("id"), rank)
+            .where(fts.op("MATCH")(match), _fts.c.rowid >= func.coalesce(oldest_candidate, 0))
+            .order_by(rank, _fts.c.rowid.desc())
+            .offset(offset)
+            .limit(limit)
+            .subquery()
+        )
+        return (
+            select(*VACANCY_COLUMNS)
+            .join(page, page.c.id == Vacancy.id)
+            .order_by(page.c.rank, Vacancy.id.desc())
+        )
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery(PG_SEARCH_CONFIG, " & ".join(terms))
+        vector = literal_column(f"vacancies.{PG_SEARCH_COLUMN}")
+        return (
+            select(*VACANCY_COLUMNS)
+            .where(vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc(), Vacancy.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+    raise NotImplementedError(f"Full-text search is not supported for {dialect}")
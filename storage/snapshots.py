@@ -0,0 +1,165 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import gzip
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "parseddata/snapshots")
+
+
+def payload_hash(payload: Dict) -> str:
+    """Content address of a raw vacancy payload, independent of key order"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotStore:
+    """
+    Deduplicating store of crawl dumps
+
+    Layout under `root`:
+        packs/<run_id>.jsonl.gz      payloads first seen in that run, as [hash, payload] lines
+        manifests/<run_id>.json.gz   the run: metadata, the packs it needs and its payload hashes in order
+        index                        "<hash> <pack>" lines of every stored payload
+
+    A payload seen in earlier runs is only referenced by hash, so disk usage
+    grows with the vacancies that changed, not with the number of runs. A
+    manifest is written last: a run that was interrupted leaves at most an
+    unreferenced pack behind.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or SNAPSHOT_DIR)
+        self.packs_dir = self.root / "packs"
+        self.manifests_dir = self.root / "manifests"
+        self.index_path = self.root / "index"
+        self._index: Optional[Dict[str, str]] = None
+        self._packs: Dict[str, Dict[str, Dict]] = {}
+
+    @property
+    def index(self) -> Dict[str, str]:
+        """Pack of every stored payload hash"""
+        if self._index is None:
+            self._index = {}
+            if self.index_path.exists():
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        digest, _, pack = line.strip().partition(" ")
+                        if pack:
+                            self._index.setdefault(digest, pack)
+        return self._index
+
+    def runs(self) -> List[str]:
+        """Ids of the stored runs, oldest first"""
+        if not self.manifests_dir.exists():
+            return []
+        return sorted(path.name[:-len(".json.gz")] for path in self.manifests_dir.glob("*.json.gz"))
+
+    def latest_run(self) -> Optional[str]:
+        runs = self.runs()
+        return runs[-1] if runs else None
+
+    def manifest(self, run_id: str) -> Dict:
+        with gzip.open(self.manifests_dir / f"{run_id}.json.gz", "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, run_id: str) -> List[Dict]:
+        """Vacancies of a run, in the order they were crawled"""
+        manifest = self.manifest(run_id)
+        payloads: Dict[str, Dict] = {}
+        for pack in manifest["packs"]:
+            payloads.update(self._read_pack(pack))
+        return [payloads[digest] for digest in manifest["hashes"]]
+
+    def open_run(self, run_id: Optional[str] = None, **metadata) -> "SnapshotWriter":
+        """Start recording a run; `metadata` (query, area, ...) is kept in its manifest"""
+        return SnapshotWriter(self, run_id or self._new_run_id(), metadata)
+
+    def save(self, vacancies: Iterable[Dict], run_id: Optional[str] = None, **metadata) -> str:
+        """Store a whole run at once and return its id"""
+        writer = self.open_run(run_id, **metadata)
+        writer.add(vacancies)
+        return writer.commit()
+
+    def disk_usage(self) -> int:
+        """Bytes taken by the store"""
+        if not self.root.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.root.rglob("*") if path.is_file())
+
+    def _new_run_id(self) -> str:
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = 1
+        while (self.manifests_dir / f"{run_id}.json.gz").exists() or (self.packs_dir / f"{run_id}.jsonl.gz").exists():
+            run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}"
+            suffix += 1
+        return run_id
+
+    def _read_pack(self, pack: str) -> Dict[str, Dict]:
+        if pack not in self._packs:
+            with gzip.open(self.packs_dir / f"{pack}.jsonl.gz", "rt", encoding="utf-8") as f:
+                self._packs[pack] = dict(json.loads(line) for line in f)
+        return self._packs[pack]
+
+
+class SnapshotWriter:
+    """Collects the payloads of one run; nothing is visible until commit()"""
+
+    def __init__(self, store: SnapshotStore, run_id: str, metadata: Dict):
+        self.store = store
+        self.run_id = run_id
+        self.metadata = metadata
+        self.hashes: List[str] = []
+        self.new_payloads: Dict[str, Dict] = {}
+
+    def add(self, vacancies: Iterable[Dict]) -> None:
+        for vacancy in vacancies:
+            digest = payload_hash(vacancy)
+            if digest not in self.store.index and digest not in self.new_payloads:
+                self.new_payloads[digest] = vacancy
+            self.hashes.append(digest)
+
+    def commit(self) -> str:
+        store = self.store
+        store.packs_dir.mkdir(parents=True, exist_ok=True)
+        store.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.new_payloads:
+            lines = "".join(
+                json.dumps([digest, payload], ensure_ascii=False, separators=(",", ":")) + "\n"
+                for digest, payload in self.new_payloads.items()
+            )
+            _write_atomic(store.packs_dir / f"{self.run_id}.jsonl.gz", gzip.compress(lines.encode("utf-8")))
+            with open(store.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{digest} {self.run_id}\n" for digest in self.new_payloads))
+            for digest in self.new_payloads:
+                store.index.setdefault(digest, self.run_id)
+
+        manifest = {
+            "run_id": self.run_id,
+            "created_at": datetime.now().isoformat(),
+            **self.metadata,
+            "count": len(self.hashes),
+            "new": len(self.new_payloads),
+            "packs": sorted({store.index[digest] for digest in self.hashes}),
+            "hashes": self.hashes,
+        }
+        raw = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        _write_atomic(store.manifests_dir / f"{self.run_id}.json.gz", gzip.compress(raw))
+
+        logger.info(f"Snapshot {self.run_id}: {len(self.hashes)} vacancies, {len(self.new_payloads)} new payloads")
+        return self.run_id
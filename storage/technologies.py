@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import aliased
+
+from .database import dialect_insert
+from .models import Technology, Vacancy, VacancyTechnology
+
+
+def split_tech_stack(tech_stack: Optional[str]) -> List[str]:
+    """Technology names of a comma-separated tech_stack, normalized and without duplicates"""
+    names = []
+    for name in (tech_stack or "").split(","):
+        name = name.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def technology_ids(db, names: Iterable[str]) -> Dict[str, int]:
+    """Ids of technologies by name, adding the ones not seen before"""
+    names = set(names)
+    if not names:
+        return {}
+    insert = dialect_insert(db)
+    db.execute(
+        insert(Technology.__table__).on_conflict_do_nothing(index_elements=[Technology.name]),
+        [{"name": name} for name in sorted(names)]
+    )
+    return {
+        name: technology_id
+        for technology_id, name in db.execute(
+            select(Technology.id, Technology.name).where(Technology.name.in_(names))
+        )
+    }
+
+
+def sync_technologies(db, vacancies: Sequence[Tuple[int, Optional[str]]]) -> None:
+    """
+    Replace the technology links of (vacancy id, tech_stack) pairs
+
+    Works with a Session or a Connection and leaves the commit to the caller,
+    so links are written in the same transaction as the vacancies.
+    """
+    if not vacancies:
+        return
+    stacks = {vacancy_id: split_tech_stack(tech_stack) for vacancy_id, tech_stack in vacancies}
+    ids = technology_ids(db, (name for names in stacks.values() for name in names))
+
+    db.execute(delete(VacancyTechnology).where(VacancyTechnology.vacancy_id.in_(list(stacks))))
+    links = [
+        {"vacancy_id": vacancy_id, "technology_id": ids[name]}
+        for vacancy_id, names in stacks.items()
+        for name in names
+    ]
+    if links:
+        db.execute(VacancyTechnology.__table__.insert(), links)
+
+
+def delete_technology_links(db, vacancy_ids) -> int:
+    """
+    Drop the links of vacancies that are about to be deleted
+
+    SQLite does not enforce ON DELETE CASCADE unless foreign keys are
+    switched on, so deletes of vacancies call this first. `vacancy_ids` may
+    be a list or a SELECT of ids.
+    """
+    return db.execute(
+        delete(VacancyTechnology).where(VacancyTechnology.vacancy_id.in_(vacancy_ids))
+    ).rowcount
+
+
+def with_technology(name: str):
+    """SELECT of the ids of vacancies listing a technology, for Vacancy.id.in_()"""
+    return (
+        select(VacancyTechnology.vacancy_id)
+        .join(Technology, Technology.id == VacancyTechnology.technology_id)
+        .where(Technology.name == name.strip().lower())
+    )
+
+
+# A technology with fewer vacancies is filtered by reading its vacancies first
+RARE_TECHNOLOGY_VACANCIES = 10000
+
+
+def has_technology(name: str):
+    """
+    EXISTS condition on Vacancy: the vacancy lists a technology
+
+    Checked per vacancy on the (vacancy_id, technology_id) primary key, so a
+    query ordered by an index of vacancies keeps that order and stops at its
+    LIMIT, unlike Vacancy.id.in_(with_technology()), which reads every
+    vacancy of the technology first. That is cheaper for common
+    technologies, with_technology() for rare ones (RARE_TECHNOLOGY_VACANCIES).
+    """
+    technology_id = select(Technology.id).where(Technology.name == name.strip().lower()).scalar_subquery()
+    return (
+        select(VacancyTechnology.vacancy_id)
+        .where(VacancyTechnology.vacancy_id == Vacancy.id, VacancyTechnology.technology_id == technology_id)
+        .exists()
+    )
+
+
+def tech_counts(db,
+                since: Optional[datetime] = None,
+                until: Optional[datetime] = None,
+                limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Number of vacancies per technology, most frequent first
+
+    since/until restrict the vacancies by created_at.
+    """
+    counts = select(VacancyTechnology.technology_id, func.count().label("count"))
+    if since or until:
+        counts = counts.join(Vacancy, Vacancy.id == VacancyTechnology.vacancy_id)
+        if since:
+            counts = counts.where(Vacancy.created_at >= since)
+        if until:
+            counts = counts.where(Vacancy.created_at < until)
+    counts = counts.group_by(VacancyTechnology.technology_id).subquery()
+
+    query = (
+        select(Technology.name, counts.c.count)
+        .join(counts, counts.c.technology_id == Technology.id)
+        .order_by(counts.c.count.desc(), Technology.name)
+    )
+    if limit:
+        query = query.limit(limit)
+    return {name: count for name, count in db.execute(query)}
+
+
+def related_technologies(db, name: str, limit: int = 20) -> Dict[str, int]:
+    """Technologies listed together with `name`, by number of shared vacancies"""
+    own = aliased(VacancyTechnology)
+    other = aliased(VacancyTechnology)
+    own_tech = aliased(Technology)
+    other_tech = aliased(Technology)
+    query = (
+        select(other_tech.name, func.count().label("count"))
+        .select_from(own)
+        .join(own_tech, own_tech.id == own.technology_id)
+        .join(other, (other.vacancy_id == own.vacancy_id) & (other.technology_id != own.technology_id))
+        .join(other_tech, other_tech.id == other.technology_id)
+        .where(own_tech.name == name.strip().lower())
+        .group_by(other_tech.name)
+        .order_by(func.count().desc(), other_tech.name)
+        .limit(limit)
+    )
+    return {related: count for related, count in db.execute(query)}
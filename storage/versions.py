@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from .database import dialect_insert
+from .models import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# Counter bumped by every write to vacancies and the tables derived from them
+VACANCIES = "vacancies"
+
+
+def bump_data_version(db, name: str = VACANCIES) -> None:
+    """
+    Increment a data version in the caller's transaction
+
+    Called by every path that changes what readers see (ingest, retention,
+    retagging, rollup rebuilds), before its commit, so the new version
+    becomes visible together with the data. Works with a Session or a
+    Connection.
+    """
+    table = DataVersion.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table).values(name=name, version=1, updated_at=datetime.now())
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    ))
+
+
+def get_data_version(db, name: str = VACANCIES) -> int:
+    """Current data version, 0 if the data was never written through a bumping path"""
+    return db.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar() or 0
+
+
+class VersionedCache:
+    """
+    In-process cache of computed results, valid while the data version does not change
+
+    An entry computed for version N is served until a caller asks with
+    another version; the data version is read from the database on every
+    request, so writes from other processes (bot, collector) invalidate
+    the entry too. Concurrent misses of the same key and version share one
+    computation; if it fails, every waiter gets the error and nothing is
+    cached.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        self._pending: Dict[Tuple[Hashable, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable, version: int, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        pending = self._pending.get((key, version))
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(key, version)] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so an error nobody else waited for is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            current = self._entries.get(key)
+            if current is None or current[0] <= version:
+                self._entries[key] = (version, value)
+            return value
+        finally:
+            del self._pending[(key, version)]
+
+    def clear(self) -> None:
+        self._entries.clear()
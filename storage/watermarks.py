@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+import logging
+
+from sqlalchemy.orm import Session
+
+from .models import CrawlWatermark
+
+logger = logging.getLogger(__name__)
+
+# How often an incremental crawl is replaced by a full re-sync
+FULL_RESYNC_DAYS = int(os.getenv("FULL_RESYNC_DAYS", "7"))
+
+
+def _parse_published_at(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+
+
+def get_date_from(db: Session,
+                  query: str,
+                  area: int,
+                  full: bool = False,
+                  source: str = "hh.ru") -> Optional[str]:
+    """
+    Return the `date_from` to crawl (query, area) of a source from, or None for a full crawl
+
+    A full crawl is done when it is requested explicitly, when nothing was
+    crawled yet, or when the last full re-sync is older than FULL_RESYNC_DAYS.
+    """
+    if full:
+        return None
+
+    watermark = db.query(CrawlWatermark).filter(
+        CrawlWatermark.source == source,
+        CrawlWatermark.query == query,
+        CrawlWatermark.area == area
+    ).first()
+    if not watermark or not watermark.last_published_at:
+        return None
+
+    if (watermark.last_full_sync_at is None
+            or watermark.last_full_sync_at < datetime.now() - timedelta(days=FULL_RESYNC_DAYS)):
+        logger.info(f"Full re-sync is due for {source} '{query}' (area {area})")
+        return None
+
+    return watermark.last_published_at
+
+
+def save_watermark(db: Session,
+                   query: str,
+                   area: int,
+                   published_at: Optional[str],
+                   full_sync: bool = False,
+                   source: str = "hh.ru",
+                   complete: bool = True) -> bool:
+    """
+    Advance the watermark of (query, area) of a source after a crawl was stored
+
+    Must be called only once the crawled vacancies are committed, otherwise
+    a failed run would skip them on the next incremental crawl. A crawl that
+    lost pages or results (complete=False, see BaseParser.complete) leaves
+    the watermark where it was, so the next run fetches those vacancies again.
+    Returns whether the watermark was saved.
+    """
+    if not complete:
+        logger.warning(f"Crawl of {source} '{query}' (area {area}) missed vacancies, watermark not advanced")
+        return False
+
+    watermark = db.query(CrawlWatermark).filter(
+        CrawlWatermark.source == source,
+        CrawlWatermark.query == query,
+        CrawlWatermark.area == area
+    ).first()
+    if not watermark:
+        watermark = CrawlWatermark(source=source, query=query, area=area)
+        db.add(watermark)
+
+    if published_at and (
+        not watermark.last_published_at
+        or _parse_published_at(published_at) > _parse_published_at(watermark.last_published_at)
+    ):
+        watermark.last_published_at = published_at
+    if full_sync:
+        watermark.last_full_sync_at = datetime.now()
+
+    db.commit()
+    logger.info(f"Watermark for {source} '{query}' (area {area}) is now {watermark.last_published_at}")
+    return True
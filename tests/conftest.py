@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never touch the real database or the hh.ru response cache
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ["HH_CACHE_TTL"] = "0"
@@ -0,0 +1,11 @@
+import pytest
+
+from parsers.base import BaseParser
+
+
+def test_parser_without_iter_pages_cannot_be_created():
+    class IncompleteParser(BaseParser):
+        pass
+
+    with pytest.raises(TypeError, match="iter_pages"):
+        IncompleteParser()
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A source that never returns; the collector must report it and the process must still exit
+HUNG_SOURCE = textwrap.dedent("""
+    import threading
+
+    from parsers.base import BaseParser
+    from scripts.data_collector import DataCollector
+    from storage.database import init_db
+
+    class HungParser(BaseParser):
+        def iter_pages(self, search_query="python developer", area=1, date_from=None):
+            threading.Event().wait()
+            yield []
+
+    init_db()
+    collector = DataCollector(source_timeout=0.5)
+    collector.parsers = {"hung": HungParser()}
+    print(collector.collect_data()["sources"]["hung"]["error"])
+""")
+
+
+def test_hung_source_times_out(tmp_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path}/test.db", "PYTHONPATH": ROOT_DIR}
+    result = subprocess.run([sys.executable, "-c", HUNG_SOURCE], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=30)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "timeout"
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from parsers.hh_enricher import VacancyEnricher
+from parsers.hh_parser import HHParser
+from scripts.fake_hh_server import run_in_thread
+
+VACANCIES = 20
+
+
+def vacancy(i: int) -> dict:
+    return {"title": f"Developer {i}", "company": "ACME", "tech_stack": "python",
+            "url": f"https://hh.ru/vacancy/{1000 + i}", "source": "hh.ru"}
+
+
+@pytest.fixture
+def enricher(tmp_path, monkeypatch):
+    """Enricher against an hh.ru stand-in whose vacancy details mention Django and PostgreSQL"""
+    state = {"requests": 0}
+
+    async def details(request):
+        state["requests"] += 1
+        return web.json_response({"key_skills": [{"name": "Django"}], "description": "<p>PostgreSQL 14</p>"})
+
+    app = web.Application()
+    app.router.add_get("/vacancies/{vacancy_id}", details)
+    base_url, stop = run_in_thread(app)
+    monkeypatch.setattr(HHParser, "BASE_URL", base_url)
+    monkeypatch.setenv("API_MAX_RETRIES", "0")
+    monkeypatch.setenv("API_RATE_LIMIT", "1000")
+    yield VacancyEnricher(workers=4, cache_dir=str(tmp_path / "details")), state
+    stop.set()
+
+
+def test_enrich_off_the_event_loop(enricher, monkeypatch):
+    enricher, state = enricher
+    extract_threads = set()
+    extract_skills = VacancyEnricher.extract_skills
+
+    def recording_extract_skills(details):
+        extract_threads.add(threading.get_ident())
+        return extract_skills(details)
+
+    monkeypatch.setattr(VacancyEnricher, "extract_skills", staticmethod(recording_extract_skills))
+
+    async def enrich():
+        vacancies = [vacancy(i) for i in range(VACANCIES)]
+        stats = await enricher.enrich_async(vacancies)
+        return threading.get_ident(), vacancies, stats
+
+    loop_thread, vacancies, stats = asyncio.run(enrich())
+
+    assert stats == {"fetched": VACANCIES, "cached": 0, "failed": 0}
+    assert all(v["tech_stack"] == "python,django,postgresql" for v in vacancies)
+    assert loop_thread not in extract_threads
+    assert not list(enricher.cache_dir.glob("*/*.tmp"))
+
+    vacancies = [vacancy(i) for i in range(VACANCIES)]
+    assert enricher.enrich(vacancies) == {"fetched": 0, "cached": VACANCIES, "failed": 0}
+    assert state["requests"] == VACANCIES
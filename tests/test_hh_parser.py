@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from sqlalchemy.orm import sessionmaker
+
+from parsers.hh_parser import HHParser
+from scripts.fake_hh_server import run_in_thread
+from storage.database import create_db_engine
+from storage.models import Base, CrawlWatermark
+from storage.watermarks import save_watermark
+
+PAGES = 3
+FAILING_PAGE = 1
+
+
+def raw_vacancy(page: int, i: int) -> dict:
+    return {
+        "id": str(page * 100 + i),
+        "name": f"Python developer {page}-{i}",
+        "employer": {"name": "ACME"},
+        "area": {"id": "1", "name": "Москва"},
+        "salary": {"from": 100000, "to": None, "currency": "RUR"},
+        "alternate_url": f"https://hh.ru/vacancy/{page * 100 + i}",
+        "published_at": f"2025-06-0{PAGES - page}T12:00:00+0300",
+        "snippet": {"requirement": "Python, Django", "responsibility": None},
+    }
+
+
+@pytest.fixture
+def hh_server(monkeypatch):
+    """
+    hh.ru stand-in serving PAGES pages; the page in state["failing_page"] always answers 500,
+    and state["found"] overrides the number of results it reports
+    """
+    state = {"failing_page": FAILING_PAGE, "found": PAGES * 10}
+
+    async def vacancies(request):
+        page = int(request.query.get("page", 0))
+        if page == state["failing_page"]:
+            return web.json_response({}, status=500)
+        items = [raw_vacancy(page, i) for i in range(10)] if page < PAGES else []
+        return web.json_response({"items": items, "found": state["found"], "pages": PAGES, "page": page, "per_page": 100})
+
+    app = web.Application()
+    app.router.add_get("/vacancies", vacancies)
+    base_url, stop = run_in_thread(app)
+    monkeypatch.setattr(HHParser, "BASE_URL", base_url)
+    yield state
+    stop.set()
+
+
+@pytest.fixture
+def parser(hh_server, monkeypatch):
+    monkeypatch.setenv("API_MAX_RETRIES", "0")
+    return HHParser()
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/test.db")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_async_crawl_counts_failed_page(parser):
+    async def crawl():
+        return [page async for page in parser.aiter_pages("python developer", 1)]
+
+    pages = asyncio.run(crawl())
+
+    assert [len(page) for page in pages] == [10, 0, 10]
+    assert parser.failed_pages == 1
+
+
+def test_sync_crawl_counts_failed_page(parser):
+    pages = list(parser.iter_pages("python developer", 1))
+
+    assert [len(page) for page in pages] == [10]
+    assert parser.failed_pages == 1
+
+
+def test_watermark_not_advanced_after_failed_page(parser, db):
+    list(parser.iter_pages("python developer", 1))
+
+    saved = save_watermark(db, "python developer", 1, parser.last_published_at,
+                           complete=not parser.failed_pages)
+
+    assert saved is False
+    assert db.query(CrawlWatermark).count() == 0
+
+
+def test_watermark_advanced_after_complete_crawl(hh_server, parser, db):
+    hh_server["failing_page"] = None
+    list(parser.iter_pages("python developer", 1))
+
+    saved = save_watermark(db, "python developer", 1, parser.last_published_at,
+                           complete=not parser.failed_pages)
+
+    assert saved is True
+    assert parser.failed_pages == 0
+    assert db.query(CrawlWatermark).one().last_published_at == "2025-06-03T12:00:00+0300"
+
+
+def test_crawl_over_result_cap_is_incomplete(hh_server, parser, db):
+    hh_server["failing_page"] = None
+    hh_server["found"] = HHParser.RESULT_CAP + 500
+
+    async def crawl():
+        return [page async for page in parser.aiter_pages("python developer", 1, "2025-06-01T00:00:00+0300")]
+
+    asyncio.run(crawl())
+    list(parser.iter_pages("python developer", 1, "2025-06-01T00:00:00+0300"))
+
+    assert parser.failed_pages == 0
+    assert parser.truncated_results == 2 * 500
+    assert parser.complete is False
+    assert save_watermark(db, "python developer", 1, parser.last_published_at, complete=parser.complete) is False
+    assert db.query(CrawlWatermark).count() == 0
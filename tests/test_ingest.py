@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from storage.database import create_db_engine
+from storage.ingest import upsert_vacancies
+from storage.models import Base, Vacancy, VacancyDailyStat
+from storage.rollups import ALL_TECHNOLOGIES, rebuild_rollups
+
+WRITERS = 4
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/test.db")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def vacancies(count: int, salary: int = 100000) -> list:
+    return [
+        {"title": f"Python developer {i}", "company": "ACME", "city": "Москва", "tech_stack": "python,django",
+         "salary_from": salary, "salary_to": None, "currency": "RUR", "url": f"https://hh.ru/vacancy/{i}",
+         "source": "hh.ru"}
+        for i in range(count)
+    ]
+
+
+def rollup_totals(db) -> list:
+    return db.execute(
+        select(VacancyDailyStat.technology, VacancyDailyStat.vacancy_count, VacancyDailyStat.salary_from_sum)
+        .order_by(VacancyDailyStat.technology)
+    ).all()
+
+
+def store_concurrently(sessions, batch: list) -> list:
+    barrier = threading.Barrier(WRITERS)
+    results = []
+
+    def write():
+        with sessions() as db:
+            barrier.wait()
+            results.append(upsert_vacancies(db, batch))
+
+    threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_writers_store_each_vacancy_once(sessions):
+    results = store_concurrently(sessions, vacancies(3))
+    assert sum(counts["new"] for counts in results) == 3
+    assert sum(counts["skipped"] for counts in results) == 3 * (WRITERS - 1)
+
+    results = store_concurrently(sessions, vacancies(3, salary=150000))
+    assert sum(counts["updated"] for counts in results) == 3
+
+    with sessions() as db:
+        assert db.scalar(select(func.count()).select_from(Vacancy)) == 3
+        totals = rollup_totals(db)
+        assert (ALL_TECHNOLOGIES, 3, 450000) in totals
+        rebuild_rollups(db)
+        assert rollup_totals(db) == totals
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import delete, update
+
+from parsers.base import FINGERPRINT_FIELDS, vacancy_fingerprint
+from scripts.retag_vacancies import retag_vacancies
+from storage.database import SessionLocal, engine
+from storage.ingest import upsert_vacancies
+from storage.models import Base, Vacancy
+
+LAST_UPDATE = datetime(2025, 6, 1, 19, 50, 41)
+
+
+def test_retag_keeps_updated_at():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(delete(Vacancy))
+        upsert_vacancies(db, [
+            {"title": "Go developer", "company": "ACME", "city": "Москва", "tech_stack": "golang,postgres",
+             "salary_from": None, "salary_to": None, "currency": None, "url": "https://hh.ru/vacancy/1",
+             "source": "hh.ru"}
+        ])
+        db.execute(update(Vacancy).values(updated_at=LAST_UPDATE))
+        db.commit()
+
+    assert retag_vacancies() == 1
+
+    with SessionLocal() as db:
+        vacancy = db.query(Vacancy).one()
+        assert vacancy.tech_stack == "go,postgresql"
+        assert vacancy.updated_at == LAST_UPDATE
+        assert vacancy.content_hash == vacancy_fingerprint(
+            {field: getattr(vacancy, field) for field in FINGERPRINT_FIELDS}
+        )
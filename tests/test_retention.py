@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from storage import retention
+from storage.database import create_db_engine
+from storage.ingest import upsert_vacancies
+from storage.models import Base, Vacancy, VacancyTechnology
+from storage.rollups import rollup_summary
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/test.db")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def seed(db, count: int) -> None:
+    upsert_vacancies(db, [
+        {"title": f"Python developer {i}", "company": "ACME", "city": "Москва", "tech_stack": "python,django",
+         "salary_from": 100000, "salary_to": None, "currency": "RUR", "url": f"https://hh.ru/vacancy/{i}",
+         "source": "hh.ru"}
+        for i in range(count)
+    ])
+    db.execute(update(Vacancy).values(updated_at=datetime.now() - timedelta(days=60)))
+    db.commit()
+
+
+def test_vacancy_refreshed_during_archiving_is_kept(db, tmp_path, monkeypatch):
+    seed(db, 3)
+    refreshed_id = db.query(Vacancy.id).order_by(Vacancy.id).first()[0]
+    write_partitions = retention._write_partitions
+
+    def write_then_refresh(rows, archive_dir, batch_name):
+        # A crawl updates one of the selected vacancies before the batch is deleted
+        db.execute(update(Vacancy).where(Vacancy.id == refreshed_id).values(updated_at=datetime.now()))
+        return write_partitions(rows, archive_dir, batch_name)
+
+    monkeypatch.setattr(retention, "_write_partitions", write_then_refresh)
+    stats = retention.archive_expired_vacancies(db, datetime.now() - timedelta(days=30),
+                                                archive_dir=str(tmp_path / "archive"))
+
+    assert stats["archived"] == 3
+    assert stats["deleted"] == 2
+    assert [v.id for v in db.query(Vacancy)] == [refreshed_id]
+    assert {link.vacancy_id for link in db.query(VacancyTechnology)} == {refreshed_id}
+    assert rollup_summary(db)["vacancies"] == 1
+    assert rollup_summary(db, technology="python")["vacancies"] == 1
@@ -0,0 +1,17 @@
+import pytest
+
+from parsers.tech_matcher import extract_tech_stack
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Python3, C++17, Vue3 и PostgreSQL14", ["python", "c++", "vue", "postgresql"]),
+    ("Python 3.11 или python3.11, Go1.21", ["python", "go"]),
+    ("Node.js18, html5 и k8s", ["node.js", "html", "kubernetes"]),
+])
+def test_trailing_version_is_ignored(text, expected):
+    assert extract_tech_stack(text) == expected
+
+
+def test_whole_tokens_only():
+    assert extract_tech_stack("Google, GitHub, golang. Postgres.") == ["go", "postgresql"]
+    assert extract_tech_stack("c#, c++ и .NET") == ["c#", "c++"]